@@ -11,11 +11,25 @@ Usage:
 
 import sys
 import os
+import importlib.util
 from pathlib import Path
 
 # Add parent directory to path
 sys.path.insert(0, str(Path(__file__).parent))
 
+# Placeholder values that must never reach a real deployment:
+# .env.example templates and the config.py test defaults
+_KNOWN_BAD = frozenset({
+    '',
+    'https://your-project.supabase.co',
+    'your-project.supabase.co',
+    'your-anon-key-here',
+    'your-service-role-key-here',
+    'test-anon-key',
+    'test-service-role-key',
+})
+_PLACEHOLDER_PREFIXES = ('your-', 'test-')
+
 def check_env_file():
     """Check if .env file exists"""
     env_path = Path(__file__).parent / '.env'
@@ -40,7 +54,7 @@ def check_required_env_vars():
         
         all_set = True
         for var_name, var_value in required_vars:
-            if not var_value or var_value == 'your-project.supabase.co' or 'your-' in var_value:
+            if not var_value or var_value in _KNOWN_BAD or var_value.startswith(_PLACEHOLDER_PREFIXES):
                 print(f"❌ ERROR: {var_name} not properly set")
                 all_set = False
             else:
@@ -84,10 +98,11 @@ def check_dependencies():
     
     missing = []
     for package in required_packages:
-        try:
-            __import__(package)
+        # find_spec locates the package without executing it (much faster
+        # than importing pandas/yfinance just to prove they are installed)
+        if importlib.util.find_spec(package) is not None:
             print(f"✅ {package} installed")
-        except ImportError:
+        else:
             print(f"❌ {package} NOT installed")
             missing.append(package)
     
@@ -7,7 +7,7 @@ using Pydantic Settings for type validation.
 
 from pydantic_settings import BaseSettings, SettingsConfigDict
 from typing import Optional, List
-from functools import lru_cache
+from functools import cached_property, lru_cache
 
 
 class Settings(BaseSettings):
@@ -36,9 +36,9 @@ class Settings(BaseSettings):
     # CORS settings
     CORS_ORIGINS: str = "http://localhost:3000,http://127.0.0.1:3000"
     
-    @property
+    @cached_property
     def cors_origins_list(self) -> List[str]:
-        """Parse CORS_ORIGINS string into list"""
+        """Parse CORS_ORIGINS string into list (computed once per instance)"""
         return [origin.strip() for origin in self.CORS_ORIGINS.split(",")]
     
     # =====================================================
@@ -56,9 +56,18 @@ class Settings(BaseSettings):
     # How long market data remains valid (in hours)
     MARKET_DATA_STALE_HOURS: int = 24
     
+    # Persistent cache of Yahoo Finance results (SQLite file, empty = disabled)
+    MARKET_DATA_CACHE_PATH: str = 'cache/marketdata.db'
+    
+    # How long cached descriptive fields (name, sector, type...) stay valid (in days)
+    MARKET_PROFILE_CACHE_DAYS: int = 30
+    
     # Rate limiting: delay between API calls (in seconds)
     API_RATE_LIMIT_DELAY: float = 1.0
     
+    # Maximum number of concurrent Yahoo requests (history, info) per enrichment run
+    ENRICHMENT_CONCURRENCY: int = 10
+    
     # =====================================================
     # LOGGING
     # =====================================================
@@ -69,6 +78,9 @@ class Settings(BaseSettings):
     # SECURITY
     # =====================================================
     SECRET_KEY: Optional[str] = None
+    # Supabase JWT secret (Settings > API): verify access tokens locally
+    # instead of calling the auth server on every request
+    SUPABASE_JWT_SECRET: Optional[str] = None
     # Skip ownership checks in development (DANGEROUS - dev only!)
     SKIP_OWNERSHIP_CHECK: bool = False
     
@@ -6,7 +6,8 @@ Enrichit tous les actifs du portefeuille avec des données de marché réalistes
 
 import os
 import sys
-from datetime import datetime
+from datetime import datetime, timezone
+import pandas as pd
 from dotenv import load_dotenv
 from supabase import create_client
 
@@ -67,38 +68,42 @@ ENRICHMENT_DATA = {
     'FR0013326246': {'sector': 'Real Estate', 'last_price': 81.50, 'perf_1y': -12.8, 'volatility_1y': 28.5},
 }
 
+# Vue colonnaire des mêmes données (une ligne par ISIN) : sert au payload de
+# la mise à jour groupée et aux calculs vectorisés, p. ex.
+# ENRICHMENT_DF[['perf_1y', 'volatility_1y']].to_numpy()
+ENRICHMENT_DF = pd.DataFrame.from_dict(ENRICHMENT_DATA, orient='index').rename_axis('isin').reset_index()
+
 def enrich_assets():
     """Enrichit tous les assets avec les données de marché"""
     print(f"🚀 Début de l'enrichissement des assets")
-    print(f"   {len(ENRICHMENT_DATA)} actifs à enrichir\n")
+    print(f"   {len(ENRICHMENT_DF)} actifs à enrichir\n")
+    
+    # Horodatage unique (UTC) pour tout le lot
+    now_iso = datetime.now(timezone.utc).isoformat()
+    rows = ENRICHMENT_DF.assign(data_source='manual', last_updated=now_iso).to_dict('records')
+    
+    # Une seule requête pour tous les assets (voir update_assets_bulk dans
+    # sql/supabase-migration-performance.sql) : les ISIN inconnus sont ignorés.
+    # Un échec de l'appel (migration absente, EXECUTE refusé...) arrête le
+    # script : rien n'a été mis à jour, ce n'est pas un asset manquant.
+    try:
+        result = supabase.rpc('update_assets_bulk', {'payload': rows}).execute()
+    except Exception as e:
+        print(f"❌ Erreur lors de la mise à jour groupée - {e}")
+        print("   Vérifier que sql/supabase-migration-performance.sql est appliquée")
+        print("   et que SUPABASE_SERVICE_ROLE_KEY est bien la clé service_role")
+        sys.exit(1)
+    updated_isins = {row['isin'] for row in (result.data or [])}
     
     success_count = 0
     failed_count = 0
     
-    for isin, data in ENRICHMENT_DATA.items():
-        try:
-            # Update asset
-            result = supabase.table('assets') \
-                .update({
-                    'sector': data['sector'],
-                    'last_price': data['last_price'],
-                    'perf_1y': data['perf_1y'],
-                    'volatility_1y': data['volatility_1y'],
-                    'data_source': 'manual',
-                    'last_updated': datetime.now().isoformat()
-                }) \
-                .eq('isin', isin) \
-                .execute()
-            
-            if result.data:
-                print(f"✅ {isin}: {data['sector']} - {data['last_price']}€ ({data['perf_1y']:+.1f}%)")
-                success_count += 1
-            else:
-                print(f"⚠️  {isin}: Asset non trouvé dans la base")
-                failed_count += 1
-                
-        except Exception as e:
-            print(f"❌ {isin}: Erreur - {e}")
+    for asset in ENRICHMENT_DF.itertuples(index=False):
+        if asset.isin in updated_isins:
+            print(f"✅ {asset.isin}: {asset.sector} - {asset.last_price}€ ({asset.perf_1y:+.1f}%)")
+            success_count += 1
+        else:
+            print(f"⚠️  {asset.isin}: Asset non trouvé dans la base")
             failed_count += 1
     
     print(f"\n{'='*60}")
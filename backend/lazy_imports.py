@@ -0,0 +1,42 @@
+"""
+Lazy Imports
+
+Heavy third-party modules (pandas, numpy, yfinance, requests, httpx) take a noticeable
+amount of time to import. Accessing them through this module defers the
+actual import until the first attribute access, so that code paths which
+never touch them (health checks, config checks, app startup) stay fast.
+
+Usage:
+    ```python
+    import lazy_imports
+
+    df = lazy_imports.pandas.read_csv(...)
+    ```
+"""
+
+import importlib
+from types import ModuleType
+
+_LAZY_MODULES = {
+    'pandas': 'pandas',
+    'numpy': 'numpy',
+    'yfinance': 'yfinance',
+    'requests': 'requests',
+    'httpx': 'httpx',
+}
+
+__all__ = list(_LAZY_MODULES)
+
+
+def __getattr__(name: str) -> ModuleType:
+    """
+    Import the requested heavy module on first access and cache it.
+
+    Raises:
+        AttributeError: If the name is not a known lazy module
+    """
+    if name not in _LAZY_MODULES:
+        raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+    module = importlib.import_module(_LAZY_MODULES[name])
+    globals()[name] = module
+    return module
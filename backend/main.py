@@ -9,6 +9,7 @@ Version: 1.0.0 (Sprint 1)
 """
 
 from fastapi import FastAPI
+from fastapi.responses import ORJSONResponse
 from fastapi.middleware.cors import CORSMiddleware
 from contextlib import asynccontextmanager
 import logging
@@ -16,6 +17,8 @@ from typing import AsyncIterator
 
 from config import settings
 from routers import portfolios
+from utils.supabase_client import get_supabase, close_supabase_client
+from services.enrichment import close_market_data_service
 
 # =====================================================
 # LOGGING CONFIGURATION
@@ -38,7 +41,7 @@ async def lifespan(app: FastAPI) -> AsyncIterator[None]:
     Application lifespan manager.
     
     Handles startup and shutdown events:
-    - Startup: Initialize connections, load resources
+    - Startup: Initialize connections (shared Supabase client), load resources
     - Shutdown: Cleanup resources, close connections
     """
     # Startup
@@ -48,10 +51,20 @@ async def lifespan(app: FastAPI) -> AsyncIterator[None]:
     logger.info(f"Supabase URL: {settings.SUPABASE_URL}")
     logger.info(f"CORS origins: {settings.cors_origins_list}")
     
+    # One Supabase client (and HTTP connection pool) shared by all requests
+    try:
+        app.state.supabase = get_supabase()
+    except Exception as e:
+        logger.error(f"❌ Supabase client not initialized: {e}")
+        app.state.supabase = None
+    
     yield
     
     # Shutdown
     logger.info("🛑 Shutting down OneWealth API...")
+    app.state.supabase = None
+    close_supabase_client()
+    await close_market_data_service()
 
 # =====================================================
 # APPLICATION SETUP
@@ -76,6 +89,7 @@ app = FastAPI(
     version="1.0.0",
     docs_url="/docs" if settings.DEBUG else None,  # Disable docs in production
     redoc_url="/redoc" if settings.DEBUG else None,
+    default_response_class=ORJSONResponse,
     lifespan=lifespan
 )
 
@@ -7,20 +7,30 @@ This module defines all API endpoints related to portfolio management:
 - Triggering enrichment
 """
 
-from fastapi import APIRouter, UploadFile, File, HTTPException, Depends, Request
-from typing import List
+from fastapi import APIRouter, UploadFile, File, HTTPException, Depends, Request, BackgroundTasks, Response
+from pydantic import TypeAdapter
+from typing import Dict, List, Optional, Tuple
+import asyncio
 import csv
+import hashlib
 import io
 from datetime import datetime
 import logging
-from config import get_settings
+import jwt
+from postgrest.exceptions import APIError
+from postgrest.types import ReturnMethod
+from config import settings
+
+import lazy_imports
 
 from utils.supabase_client import get_supabase
+from utils.db import sb_execute
+from utils.cache import TTLCache
 from services.enrichment import get_market_data_service
+from schemas.asset import ISIN_PATTERN
 from schemas.portfolio import (
     CSVImportResult,
     CSVImportError,
-    PositionCSVRow,
     PositionEnriched,
     EnrichPortfolioResult
 )
@@ -32,6 +42,93 @@ from services.scoring import compute_portfolio_score
 logger = logging.getLogger(__name__)
 router = APIRouter()
 
+# ISIN -> asset UUID, so repeat imports skip the assets lookup. Bounded and
+# expiring: an asset deleted or merged in Supabase is only served until the
+# TTL runs out, or until an insert referencing it fails (see _evict_isins).
+_ISIN_ID_CACHE = TTLCache(maxsize=8192, ttl=3600.0)
+
+_BEARER_PREFIX = 'bearer '
+
+# ISIN cell values meaning "no ISIN" (e.g. cash lines such as Livret A)
+_NO_ISIN_VALUES = ('N/A', 'NA', '-')
+
+# Read caches for the profile and score endpoints (serialized JSON bodies), keyed on
+# (portfolio_id, portfolio version, user_id). Writes through this API bump the
+# portfolio version so stale entries are never served, including the background
+# enrichment queued by an import; only changes made outside the API (scripts,
+# direct SQL) are bounded by the TTL.
+_PROFILE_CACHE = TTLCache(maxsize=4096, ttl=60.0)
+_SCORE_CACHE = TTLCache(maxsize=4096, ttl=30.0)
+
+# portfolio_id -> version, bounded too. A version only has to outlive the
+# entries cached under the previous one: once it expires (longest read cache
+# TTL after the last write) those are gone, so falling back to 0 is safe.
+_PORTFOLIO_VERSIONS = TTLCache(maxsize=16384, ttl=max(_PROFILE_CACHE.ttl, _SCORE_CACHE.ttl))
+
+
+def _cache_key(portfolio_id: str, user_id) -> tuple:
+    """Cache key for a portfolio read, scoped to its current version and caller."""
+    return (portfolio_id, _PORTFOLIO_VERSIONS.get(portfolio_id, 0), user_id)
+
+
+def _invalidate_portfolio(portfolio_id: str) -> None:
+    """Invalidate cached profile/score entries after a portfolio mutation."""
+    _PORTFOLIO_VERSIONS.set(portfolio_id, _PORTFOLIO_VERSIONS.get(portfolio_id, 0) + 1)
+
+
+def _evict_isins(isins) -> None:
+    """Drop cached asset ids (e.g. after an insert referencing them failed)."""
+    for isin in isins:
+        _ISIN_ID_CACHE.pop(isin)
+
+
+def _is_fk_violation(error: APIError, column: str) -> bool:
+    """
+    Tell whether a PostgREST error is a foreign key violation on positions.<column>.
+    
+    PostgREST forwards the Postgres message (which names the constraint) and
+    details (`Key (column)=(value) is not present in table ...`).
+    """
+    if error.code != '23503':
+        return False
+    text = f"{error.message or ''} {error.details or ''}"
+    return f'positions_{column}_fkey' in text or f'Key ({column})' in text
+
+
+def _assign_asset_ids(positions: List[dict], isin_to_asset_id: Dict[str, str]) -> None:
+    """Set asset_id on the positions that carry an ISIN."""
+    for position_data in positions:
+        if position_data['isin']:
+            position_data['asset_id'] = isin_to_asset_id[position_data['isin']]
+
+
+async def _enrich_in_background(enrichment_service, portfolio_id: str) -> None:
+    """Enrich a portfolio after an import, then drop its cached reads."""
+    await enrichment_service.enrich_portfolio_assets(portfolio_id)
+    _invalidate_portfolio(portfolio_id)
+
+
+# positions_enriched columns read by PositionEnriched (the view also carries
+# asset columns the API does not expose)
+_POS_COLUMNS = (
+    'id,portfolio_id,date,provider,asset_class,instrument_name,isin,region,currency,'
+    'quantity,purchase_price,current_value,notes,asset_id,created_at,updated_at,'
+    'ticker,asset_name,sector,asset_region,last_price,perf_1y,market_data_updated_at'
+)
+
+# Flat positions_enriched rows -> PositionEnriched (asset nested by the model)
+_POSITIONS_ADAPTER = TypeAdapter(List[PositionEnriched])
+_PROFILE_ADAPTER = TypeAdapter(InvestorProfileResponse)
+_SCORE_ADAPTER = TypeAdapter(PortfolioScoreResult)
+
+# GET responses are user-specific and change on import/PATCH: let clients keep
+# them but always revalidate (a matching ETag costs a bodiless 304)
+_CACHE_CONTROL = 'private, no-cache'
+
+_REQUIRED_CSV_COLUMNS = frozenset({
+    'date', 'provider', 'asset_class', 'instrument_name', 'region', 'currency', 'current_value'
+})
+
 
 def _safe_int(val, default: int):
     """Convert to int safely: return default if val is None or invalid."""
@@ -53,9 +150,101 @@ def _safe_float(val, default: float):
         return float(default)
 
 
-def get_supabase_dependency():
-    """Dependency for Supabase client"""
-    return get_supabase()
+def _extract_bearer_token(request: Request):
+    """Return the token of a `Bearer` Authorization header, or None."""
+    auth_header = request.headers.get('authorization')
+    if auth_header and auth_header[:len(_BEARER_PREFIX)].lower() == _BEARER_PREFIX:
+        return auth_header[len(_BEARER_PREFIX):]
+    return None
+
+
+async def _resolve_user_id(supabase, token: str) -> Optional[str]:
+    """
+    Resolve the user id (JWT `sub`) of a Supabase access token.
+    
+    When SUPABASE_JWT_SECRET is configured the token is verified locally
+    (HS256 signature, expiry, `authenticated` audience), with no call to the
+    auth server. Otherwise it falls back to `supabase.auth.get_user`.
+    
+    Args:
+        supabase: Supabase client
+        token: Bearer token from the Authorization header
+    
+    Returns:
+        User id, or None if the token carries no user
+    
+    Raises:
+        Exception: If the token is invalid (jwt.PyJWTError or auth error)
+    """
+    jwt_secret = settings.SUPABASE_JWT_SECRET
+    if jwt_secret:
+        payload = jwt.decode(token, jwt_secret, algorithms=['HS256'], audience='authenticated')
+        return payload.get('sub')
+    
+    # supabase.auth.get_user may return a dict-like or object with 'user'
+    user_resp = await asyncio.to_thread(supabase.auth.get_user, token)
+    if isinstance(user_resp, dict) and 'user' in user_resp:
+        user_obj = user_resp['user']
+    else:
+        # Some clients return an object with .user
+        user_obj = getattr(user_resp, 'user', None)
+    
+    # Extract the actual user ID string from the user object
+    if isinstance(user_obj, dict):
+        return user_obj.get('id')
+    if user_obj is not None and hasattr(user_obj, 'id'):
+        return user_obj.id if isinstance(user_obj.id, str) else str(user_obj.id)
+    return None
+
+
+def _profile_response(portfolio: dict) -> dict:
+    """
+    Shape a portfolio row as an InvestorProfileResponse payload.
+    
+    Returned as a plain dict: FastAPI validates it once against the
+    endpoint's response_model, instead of dumping and re-validating a model
+    built here.
+    """
+    return {
+        'investor_profile': portfolio.get('investor_profile') or 'equilibre',
+        'target_equity_pct': _safe_float(portfolio.get('target_equity_pct'), 60.0),
+        'investment_horizon_years': _safe_int(portfolio.get('investment_horizon_years'), 10),
+        'objective': portfolio.get('objective') or 'croissance',
+    }
+
+
+def _etag_response(request: Request, content: bytes) -> Response:
+    """
+    Build a JSON response with a content-hash ETag.
+    
+    Returns 304 Not Modified (no body) when the request's If-None-Match
+    already carries the same ETag.
+    
+    Args:
+        request: Incoming request (If-None-Match header)
+        content: Serialized JSON body
+    
+    Returns:
+        200 response with the body, or 304 response
+    """
+    etag = f'"{hashlib.blake2b(content, digest_size=16).hexdigest()}"'
+    headers = {'ETag': etag, 'Cache-Control': _CACHE_CONTROL}
+    
+    if_none_match = request.headers.get('if-none-match')
+    if if_none_match and etag in (tag.strip().removeprefix('W/') for tag in if_none_match.split(',')):
+        return Response(status_code=304, headers=headers)
+    
+    return Response(content=content, media_type='application/json', headers=headers)
+
+
+def get_supabase_dependency(request: Request):
+    """
+    Dependency for Supabase client.
+    
+    Returns the client created once in the app lifespan (shared HTTP
+    connection pool), falling back to the cached module-level client.
+    """
+    return getattr(request.app.state, 'supabase', None) or get_supabase()
 
 
 def get_enrichment_service():
@@ -63,6 +252,121 @@ def get_enrichment_service():
     return get_market_data_service()
 
 
+def _parse_csv(
+    csv_file: io.TextIOBase,
+    portfolio_id: str
+) -> Tuple[List[dict], Dict[str, str], List[CSVImportError]]:
+    """
+    Parse and validate a portfolio CSV stream.
+    
+    Validation is done column-wise with pandas (one vectorized pass per
+    column) instead of building a Pydantic model per row. Row numbers come
+    from each row's position in the file, and a row with more fields than
+    the header is reported as one bad row. Runs synchronously (called
+    through ``asyncio.to_thread``).
+    
+    Args:
+        csv_file: Text stream positioned at the CSV header
+        portfolio_id: UUID of the target portfolio
+    
+    Returns:
+        Tuple (positions to insert, ISIN -> instrument name, row errors)
+    
+    Raises:
+        HTTPException: If required columns are missing or no row is valid
+    """
+    pd = lazy_imports.pandas
+    np = lazy_imports.numpy
+    
+    # Tokenize with the csv module: read_csv either silently drops the extra
+    # fields of a too-long first row or aborts on a later one, while a ragged
+    # row must only fail itself. Blank lines are skipped, as by read_csv.
+    reader = csv.reader(csv_file)
+    header = next(reader, [])
+    width = len(header)
+    df = pd.DataFrame([fields for fields in reader if fields], dtype=object)
+    df = df.reindex(columns=range(max(df.shape[1], width)))
+    
+    # Fields past the header; short rows are padded with '' like read_csv
+    extra = df.iloc[:, width:]
+    field_counts = width + extra.notna().sum(axis=1)
+    df = df.iloc[:, :width].fillna('').astype(str)
+    df.columns = header
+    
+    # Validate required columns
+    missing_columns = _REQUIRED_CSV_COLUMNS.difference(df.columns)
+    
+    if missing_columns:
+        raise HTTPException(
+            status_code=400,
+            detail=f"Missing required columns: {', '.join(sorted(missing_columns))}"
+        )
+    
+    for optional_column in ('isin', 'quantity', 'purchase_price'):
+        if optional_column not in df.columns:
+            df[optional_column] = ''
+    
+    # Same normalization as AssetCreate.validate_isin (stripped, upper-cased)
+    df['isin'] = df['isin'].str.strip().str.upper().replace(list(_NO_ISIN_VALUES), '')
+    
+    # Coerce typed columns in one pass each; invalid cells become NaN/NaT
+    dates = pd.to_datetime(df['date'], format='%Y-%m-%d', errors='coerce')
+    numbers = {
+        col: pd.to_numeric(df[col].str.replace(',', '.', regex=False), errors='coerce')
+        for col in ('current_value', 'quantity', 'purchase_price')
+    }
+    
+    # (field, invalid mask, message) - optional fields may be empty
+    checks = [
+        (None, field_counts > width, f'Too many fields: expected {width}, got {{value}}'),
+        ('date', dates.isna(), 'Invalid date format: {value}. Expected YYYY-MM-DD'),
+        ('isin', (df['isin'] != '') & ~df['isin'].str.match(ISIN_PATTERN), 'Invalid ISIN: {value}'),
+        ('current_value', numbers['current_value'].isna(), 'Invalid numeric value: {value}'),
+        ('quantity', numbers['quantity'].isna() & (df['quantity'] != ''), 'Invalid numeric value: {value}'),
+        ('purchase_price', numbers['purchase_price'].isna() & (df['purchase_price'] != ''), 'Invalid numeric value: {value}'),
+    ]
+    
+    # Report the first invalid field of each row, numbered by position
+    # (1-indexed, header is row 1)
+    errors: List[CSVImportError] = []
+    invalid = np.zeros(len(df), dtype=bool)
+    for field, mask, message in checks:
+        mask = mask.to_numpy(dtype=bool)
+        values = field_counts if field is None else df[field]
+        for position in np.flatnonzero(mask & ~invalid):
+            row_number = int(position) + 2
+            error = message.format(value=values.iat[position])
+            errors.append(CSVImportError(row=row_number, field=field, error=error))
+            logger.warning(f"Error parsing row {row_number}: {error}")
+        invalid |= mask
+    errors.sort(key=lambda err: err.row)
+    
+    valid = ~invalid
+    if not valid.any():
+        raise HTTPException(
+            status_code=400,
+            detail="No valid positions found in CSV"
+        )
+    
+    # Build position objects for valid rows
+    clean = df.loc[valid]
+    positions = clean[['date', 'provider', 'asset_class', 'instrument_name', 'isin', 'region', 'currency']].copy()
+    positions.insert(0, 'portfolio_id', portfolio_id)
+    positions['isin'] = positions['isin'].where(positions['isin'] != '', None)
+    for col, values in numbers.items():
+        positions[col] = values[valid]
+    
+    # NaN (empty optional numerics) -> None so the payload is valid JSON
+    positions = positions.astype(object)
+    positions_to_insert = positions.where(positions.notna(), None).to_dict(orient='records')
+    
+    # Assets are resolved in batch by the caller
+    with_isin = clean[clean['isin'] != ''].drop_duplicates('isin')
+    asset_names = dict(zip(with_isin['isin'], with_isin['instrument_name']))
+    
+    return positions_to_insert, asset_names, errors
+
+
 # =====================================================
 # ENDPOINT: Import CSV
 # =====================================================
@@ -70,6 +374,7 @@ def get_enrichment_service():
 @router.post("/portfolios/{portfolio_id}/import", response_model=CSVImportResult)
 async def import_portfolio_csv(
     portfolio_id: str,
+    background_tasks: BackgroundTasks,
     file: UploadFile = File(...),
     supabase = Depends(get_supabase_dependency),
     enrichment_service = Depends(get_enrichment_service)
@@ -84,12 +389,12 @@ async def import_portfolio_csv(
     ```
     
     **Process:**
-    1. Validate portfolio exists
-    2. Parse CSV file
-    3. For each row with ISIN: get or create asset
-    4. Insert positions with asset_id
-    5. Trigger enrichment of assets
-    6. Log import in csv_imports table
+    1. Parse CSV file
+    2. Get or create assets for all ISINs (batched)
+    3. Insert positions with asset_id (unknown portfolio -> FK violation -> 404;
+       stale cached asset id -> assets resolved again, one retry)
+    4. Queue enrichment of assets (runs after the response is sent)
+    5. Log import in csv_imports table
     
     Args:
         portfolio_id: UUID of the target portfolio
@@ -102,126 +407,91 @@ async def import_portfolio_csv(
         HTTPException: If portfolio not found or import fails
     """
     
-    # 1. Check if portfolio exists
-    try:
-        portfolio_response = supabase.table('portfolios').select('*').eq('id', portfolio_id).execute()
-        
-        if not portfolio_response.data:
-            raise HTTPException(status_code=404, detail=f"Portfolio {portfolio_id} not found")
-        
-        portfolio = portfolio_response.data[0]
-        
-    except Exception as e:
-        logger.error(f"Error fetching portfolio: {e}")
-        raise HTTPException(status_code=500, detail=f"Database error: {str(e)}")
-    
-    # 2. Read and parse CSV
+    # 1. Read and parse CSV
+    # The upload is decoded incrementally from its spooled temp file (no full
+    # in-memory copy) and parsed in a worker thread to keep the event loop free.
+    csv_file = io.TextIOWrapper(file.file, encoding='utf-8', newline='')
     try:
-        contents = await file.read()
-        content_str = contents.decode('utf-8')
-        csv_file = io.StringIO(content_str)
-        
-        reader = csv.DictReader(csv_file)
-        
-        positions_to_insert = []
-        errors: List[CSVImportError] = []
-        row_number = 1  # Start at 1 (header is row 0)
-        
-        # Validate required columns
-        if reader.fieldnames:
-            required_columns = ['date', 'provider', 'asset_class', 'instrument_name', 'region', 'currency', 'current_value']
-            missing_columns = [col for col in required_columns if col not in reader.fieldnames]
-            
-            if missing_columns:
-                raise HTTPException(
-                    status_code=400,
-                    detail=f"Missing required columns: {', '.join(missing_columns)}"
-                )
-        
-        # Parse each row
-        for row_dict in reader:
-            row_number += 1
-            
-            try:
-                # Validate row data
-                csv_row = PositionCSVRow(**row_dict)
-                
-                # Build position object
-                position_data = {
-                    'portfolio_id': portfolio_id,
-                    'date': csv_row.date,
-                    'provider': csv_row.provider,
-                    'asset_class': csv_row.asset_class,
-                    'instrument_name': csv_row.instrument_name,
-                    'isin': csv_row.isin if csv_row.isin else None,
-                    'region': csv_row.region,
-                    'currency': csv_row.currency,
-                    'current_value': float(csv_row.current_value.replace(',', '.')),
-                }
-                
-                # Add optional fields if present
-                if csv_row.quantity:
-                    position_data['quantity'] = float(csv_row.quantity.replace(',', '.'))
-                if csv_row.purchase_price:
-                    position_data['purchase_price'] = float(csv_row.purchase_price.replace(',', '.'))
-                
-                # If ISIN is present, get or create asset
-                if csv_row.isin:
-                    asset_id = await get_or_create_asset(supabase, csv_row.isin, csv_row.instrument_name)
-                    position_data['asset_id'] = asset_id
-                
-                positions_to_insert.append(position_data)
-                
-            except Exception as e:
-                errors.append(CSVImportError(
-                    row=row_number,
-                    field='unknown',
-                    error=str(e)
-                ))
-                logger.warning(f"Error parsing row {row_number}: {e}")
-        
-        if not positions_to_insert:
-            raise HTTPException(
-                status_code=400,
-                detail="No valid positions found in CSV"
-            )
-        
+        positions_to_insert, asset_names, errors = await asyncio.to_thread(
+            _parse_csv, csv_file, portfolio_id
+        )
     except HTTPException:
         raise
     except Exception as e:
         logger.error(f"Error parsing CSV: {e}")
         raise HTTPException(status_code=400, detail=f"CSV parsing error: {str(e)}")
+    finally:
+        # Detach so closing the wrapper doesn't close the underlying upload file
+        csv_file.detach()
+    
+    # 2. Resolve asset ids for all ISINs (one SELECT + at most one INSERT)
+    if asset_names:
+        try:
+            isin_to_asset_id = await get_or_create_assets(supabase, asset_names)
+        except Exception as e:
+            logger.error(f"Error resolving assets: {e}")
+            raise HTTPException(status_code=500, detail=f"Database error: {str(e)}")
+        
+        _assign_asset_ids(positions_to_insert, isin_to_asset_id)
     
     # 3. Insert positions into database
+    # No prior existence check: positions.portfolio_id is a foreign key, so an
+    # unknown portfolio makes the insert fail with foreign_key_violation.
+    # Only the count is needed: skip echoing the inserted rows back.
+    # The insert is a single statement, so it either stores every row or raises.
+    async def insert_positions():
+        await sb_execute(supabase.table('positions').insert(positions_to_insert, returning=ReturnMethod.minimal))
+    
     try:
-        insert_response = supabase.table('positions').insert(positions_to_insert).execute()
+        try:
+            await insert_positions()
+        except APIError as e:
+            if not asset_names or not _is_fk_violation(e, 'asset_id'):
+                raise
+            # A cached asset id went stale (asset deleted or merged in Supabase):
+            # resolve the ISINs again from the database and retry once
+            logger.warning(f"Stale asset ids for portfolio {portfolio_id} import, resolving again: {e}")
+            _evict_isins(asset_names)
+            _assign_asset_ids(positions_to_insert, await get_or_create_assets(supabase, asset_names))
+            await insert_positions()
         
-        rows_imported = len(insert_response.data) if insert_response.data else len(positions_to_insert)
+        rows_imported = len(positions_to_insert)
+        _invalidate_portfolio(portfolio_id)
         
         logger.info(f"✅ Inserted {rows_imported} positions for portfolio {portfolio_id}")
-        
+
+    except APIError as e:
+        if _is_fk_violation(e, 'portfolio_id'):
+            raise HTTPException(status_code=404, detail=f"Portfolio {portfolio_id} not found")
+        if _is_fk_violation(e, 'asset_id'):
+            # Still failing after resolving the ISINs again: don't cache the ids
+            _evict_isins(asset_names)
+            logger.error(f"Positions reference missing assets: {e}")
+            raise HTTPException(status_code=409, detail=f"Positions reference assets that no longer exist: {e.details or e.message}")
+        logger.error(f"Error inserting positions: {e}")
+        raise HTTPException(status_code=500, detail=f"Database insert error: {str(e)}")
     except Exception as e:
         logger.error(f"Error inserting positions: {e}")
         raise HTTPException(status_code=500, detail=f"Database insert error: {str(e)}")
     
-    # 4. Trigger enrichment
-    enrichment_result = None
-    try:
-        enrichment_result = enrichment_service.enrich_portfolio_assets(portfolio_id)
-        logger.info(f"Enrichment result: {enrichment_result}")
-    except Exception as e:
-        logger.error(f"Error during enrichment: {e}")
-        # Don't fail the import if enrichment fails
-        enrichment_result = {'success': 0, 'failed': 0, 'total': 0, 'error': str(e)}
+    # 4. Queue enrichment
+    # Market data fetches are rate limited (API_RATE_LIMIT_DELAY per asset), so
+    # they run as a background task instead of blocking the import response.
+    # enrich_portfolio_assets catches and logs Yahoo/DB errors itself; only a
+    # missing migration (RuntimeError) escapes, and is logged by the task runner.
+    background_tasks.add_task(_enrich_in_background, enrichment_service, portfolio_id)
+    enrichment_result = {'status': 'queued'}
     
     # 5. Log import in csv_imports table
     try:
-        # Get client_id from portfolio
-        client_id = portfolio['client_id']
-        
-        # Get user_id from client
-        client_response = supabase.table('clients').select('user_id').eq('id', client_id).execute()
-        user_id = client_response.data[0]['user_id'] if client_response.data else None
+        # Resolve the owning user through the embedded clients resource (one call)
+        owner_response = await sb_execute(
+            supabase.table('portfolios')
+            .select('client_id, clients(user_id)')
+            .eq('id', portfolio_id)
+            .single()
+        )
+        user_id = (owner_response.data.get('clients') or {}).get('user_id')
         
         import_log = {
             'portfolio_id': portfolio_id,
@@ -230,10 +500,11 @@ async def import_portfolio_csv(
             'rows_imported': rows_imported,
             'rows_failed': len(errors),
             'import_status': 'success' if not errors else 'partial',
-            'error_details': [err.dict() for err in errors] if errors else None
+            # Native list: the column is JSONB, the client serializes it once
+            'error_details': [err.model_dump() for err in errors] if errors else None
         }
         
-        supabase.table('csv_imports').insert(import_log).execute()
+        await sb_execute(supabase.table('csv_imports').insert(import_log, returning=ReturnMethod.minimal))
         
     except Exception as e:
         logger.error(f"Error logging CSV import: {e}")
@@ -249,40 +520,61 @@ async def import_portfolio_csv(
     )
 
 
-async def get_or_create_asset(supabase, isin: str, name: str) -> str:
+async def get_or_create_assets(supabase, names_by_isin: Dict[str, str]) -> Dict[str, str]:
     """
-    Get existing asset by ISIN or create a minimal one.
+    Get existing assets by ISIN or create minimal ones, in batch.
+    
+    ISINs resolved recently by this process are served from ``_ISIN_ID_CACHE``.
+    The others are looked up with a single SELECT, then the missing ones
+    are created with a single INSERT.
     
     Args:
         supabase: Supabase client
-        isin: ISIN code
-        name: Asset name
+        names_by_isin: Mapping ISIN -> asset name (used for new assets)
     
     Returns:
-        Asset UUID
+        Mapping ISIN -> asset UUID
     """
-    # Try to find existing asset
-    response = supabase.table('assets').select('id').eq('isin', isin).execute()
-    
-    if response.data:
-        return response.data[0]['id']
+    isin_to_id = {}
+    for isin in names_by_isin:
+        asset_id = _ISIN_ID_CACHE.get(isin)
+        if asset_id is not None:
+            isin_to_id[isin] = asset_id
+    uncached = [isin for isin in names_by_isin if isin not in isin_to_id]
+    if not uncached:
+        return isin_to_id
     
-    # Create new asset with minimal data
-    new_asset = {
-        'isin': isin,
-        'name': name,
-        'last_updated': None  # Will be enriched later
-    }
-    
-    insert_response = supabase.table('assets').insert(new_asset).execute()
-    
-    if not insert_response.data:
-        raise Exception(f"Failed to create asset for ISIN {isin}")
+    # Find existing assets
+    response = await sb_execute(supabase.table('assets').select('id, isin').in_('isin', uncached))
+    for row in response.data or []:
+        isin_to_id[row['isin']] = row['id']
     
-    asset_id = insert_response.data[0]['id']
-    logger.info(f"Created new asset {asset_id} for ISIN {isin}")
+    # Create missing assets with minimal data
+    missing = [isin for isin in uncached if isin not in isin_to_id]
+    if missing:
+        new_assets = [
+            {
+                'isin': isin,
+                'name': names_by_isin[isin],
+                'last_updated': None  # Will be enriched later
+            }
+            for isin in missing
+        ]
+        
+        insert_response = await sb_execute(supabase.table('assets').insert(new_assets))
+        
+        if not insert_response.data:
+            raise Exception(f"Failed to create assets for ISINs {', '.join(missing)}")
+        
+        for row in insert_response.data:
+            isin_to_id[row['isin']] = row['id']
+        
+        logger.info(f"Created {len(insert_response.data)} new assets")
     
-    return asset_id
+    for isin in uncached:
+        if isin in isin_to_id:
+            _ISIN_ID_CACHE.set(isin, isin_to_id[isin])
+    return isin_to_id
 
 
 # =====================================================
@@ -292,6 +584,7 @@ async def get_or_create_asset(supabase, isin: str, name: str) -> str:
 @router.get("/portfolios/{portfolio_id}/positions", response_model=List[PositionEnriched])
 async def get_portfolio_positions(
     portfolio_id: str,
+    request: Request,
     supabase = Depends(get_supabase_dependency)
 ):
     """
@@ -309,63 +602,30 @@ async def get_portfolio_positions(
         HTTPException: If portfolio not found
     """
     try:
-        # Check if portfolio exists
-        portfolio_response = supabase.table('portfolios').select('id').eq('id', portfolio_id).execute()
-        
-        if not portfolio_response.data:
-            raise HTTPException(status_code=404, detail=f"Portfolio {portfolio_id} not found")
-        
         # Get positions with enriched data using the view
         # Note: Supabase views are queried like regular tables
-        response = supabase.table('positions_enriched') \
-            .select('*') \
-            .eq('portfolio_id', portfolio_id) \
-            .execute()
+        response = await sb_execute(
+            supabase.table('positions_enriched')
+            .select(_POS_COLUMNS)
+            .eq('portfolio_id', portfolio_id)
+        )
         
         if not response.data:
-            return []
-        
-        # Transform data to match schema
-        positions_enriched = []
-        for pos in response.data:
-            # Build asset summary if asset data is present
-            asset_summary = None
-            if pos.get('asset_id'):
-                asset_summary = {
-                    'id': pos['asset_id'],
-                    'isin': pos.get('isin'),  # ISIN comes directly from position
-                    'ticker': pos.get('ticker'),  # ticker is a direct field in the view
-                    'name': pos.get('asset_name'),
-                    'sector': pos.get('sector'),  # sector is a direct field in the view
-                    'region': pos.get('asset_region'),
-                    'last_price': pos.get('last_price'),  # last_price is a direct field in the view
-                    'perf_1y': pos.get('perf_1y'),  # perf_1y is a direct field in the view
-                    'last_updated': pos.get('market_data_updated_at')  # Correct field name from view
-                }
+            # Only an empty result needs the existence check (404 vs empty portfolio).
+            # HEAD + exact count: PostgREST answers with a Content-Range header only
+            portfolio_response = await sb_execute(
+                supabase.table('portfolios').select('id', head=True, count='exact').eq('id', portfolio_id)
+            )
             
-            position_enriched = {
-                'id': pos['id'],
-                'portfolio_id': pos['portfolio_id'],
-                'date': pos['date'],
-                'provider': pos['provider'],
-                'asset_class': pos['asset_class'],
-                'instrument_name': pos['instrument_name'],
-                'isin': pos['isin'],
-                'region': pos['region'],
-                'currency': pos['currency'],
-                'quantity': pos.get('quantity'),
-                'purchase_price': pos.get('purchase_price'),
-                'current_value': pos['current_value'],
-                'notes': pos.get('notes'),
-                'asset_id': pos.get('asset_id'),
-                'created_at': pos['created_at'],
-                'updated_at': pos['updated_at'],
-                'asset': asset_summary
-            }
+            if not portfolio_response.count:
+                raise HTTPException(status_code=404, detail=f"Portfolio {portfolio_id} not found")
             
-            positions_enriched.append(position_enriched)
+            return _etag_response(request, b'[]')
         
-        return positions_enriched
+        # Validate and serialize in one pass each (pydantic-core); returning a
+        # Response skips FastAPI's second validation against response_model
+        positions = _POSITIONS_ADAPTER.validate_python(response.data)
+        return _etag_response(request, _POSITIONS_ADAPTER.dump_json(positions))
         
     except HTTPException:
         raise
@@ -400,14 +660,9 @@ async def enrich_portfolio(
         HTTPException: If portfolio not found or enrichment fails
     """
     try:
-        # Check if portfolio exists
-        portfolio_response = supabase.table('portfolios').select('id').eq('id', portfolio_id).execute()
-        
-        if not portfolio_response.data:
-            raise HTTPException(status_code=404, detail=f"Portfolio {portfolio_id} not found")
-        
-        # Trigger enrichment
-        result = enrichment_service.enrich_portfolio_assets(portfolio_id)
+        # Trigger enrichment (raises ValueError if the portfolio does not exist)
+        result = await enrichment_service.enrich_portfolio_assets(portfolio_id)
+        _invalidate_portfolio(portfolio_id)
         
         return EnrichPortfolioResult(
             portfolio_id=portfolio_id,
@@ -417,6 +672,8 @@ async def enrich_portfolio(
             success=result['success'] > 0
         )
         
+    except ValueError as e:
+        raise HTTPException(status_code=404, detail=str(e))
     except HTTPException:
         raise
     except Exception as e:
@@ -443,38 +700,27 @@ async def get_portfolio_profile_endpoint(
     try:
         # Extract user_id from Bearer token if provided
         user_id = None
-        auth_header = request.headers.get('authorization')
-        if auth_header and auth_header.lower().startswith('bearer '):
-            token = auth_header.split(' ', 1)[1]
+        token = _extract_bearer_token(request)
+        if token:
             try:
-                user_resp = supabase.auth.get_user(token)
-                if isinstance(user_resp, dict) and 'user' in user_resp:
-                    user_obj = user_resp['user']
-                else:
-                    user_obj = getattr(user_resp, 'user', None)
-                
-                # Extract the actual user ID string from the user object
-                if user_obj:
-                    if isinstance(user_obj, dict):
-                        user_id = user_obj.get('id')
-                    elif hasattr(user_obj, 'id'):
-                        user_id = user_obj.id if isinstance(user_obj.id, str) else str(user_obj.id)
-                    else:
-                        user_id = None
+                user_id = await _resolve_user_id(supabase, token)
             except Exception as e:
                 logger.warning(f"Failed to resolve user from token: {e}")
                 pass  # Treat as anonymous if token invalid
         
+        cache_key = _cache_key(portfolio_id, user_id)
+        # Entries are the serialized body: a hit only hashes it for the ETag
+        cached = _PROFILE_CACHE.get(cache_key)
+        if cached is not None:
+            return _etag_response(request, cached)
+        
         portfolio = await get_portfolio_profile(supabase, portfolio_id, user_id)
         if not portfolio:
             raise HTTPException(status_code=404, detail=f"Portfolio {portfolio_id} not found")
-
-        return InvestorProfileResponse(
-            investor_profile=(portfolio.get('investor_profile') or 'equilibre'),
-            target_equity_pct=_safe_float(portfolio.get('target_equity_pct'), 60.0),
-            investment_horizon_years=_safe_int(portfolio.get('investment_horizon_years'), 10),
-            objective=(portfolio.get('objective') or 'croissance')
-        )
+        
+        content = _PROFILE_ADAPTER.dump_json(_PROFILE_ADAPTER.validate_python(_profile_response(portfolio)))
+        _PROFILE_CACHE.set(cache_key, content)
+        return _etag_response(request, content)
 
     except PermissionError:
         raise HTTPException(status_code=403, detail="Forbidden")
@@ -500,17 +746,10 @@ async def patch_portfolio_profile_endpoint(
     try:
         # Extract user_id from Bearer token (required for updates)
         user_id = None
-        auth_header = request.headers.get('authorization')
-        if auth_header and auth_header.lower().startswith('bearer '):
-            token = auth_header.split(' ', 1)[1]
+        token = _extract_bearer_token(request)
+        if token:
             try:
-                user_resp = supabase.auth.get_user(token)
-                if isinstance(user_resp, dict) and 'user' in user_resp:
-                    user_id = user_resp['user'].get('id')
-                else:
-                    user_id = getattr(user_resp, 'user', None)
-                    if user_id and isinstance(user_id, dict):
-                        user_id = user_id.get('id')
+                user_id = await _resolve_user_id(supabase, token)
             except Exception:
                 raise HTTPException(status_code=401, detail="Invalid or missing authentication token")
         
@@ -526,13 +765,9 @@ async def patch_portfolio_profile_endpoint(
             investment_horizon_years=payload.investment_horizon_years,
             objective=payload.objective
         )
-
-        return InvestorProfileResponse(
-            investor_profile=(updated.get('investor_profile') or 'equilibre'),
-            target_equity_pct=_safe_float(updated.get('target_equity_pct'), 60.0),
-            investment_horizon_years=_safe_int(updated.get('investment_horizon_years'), 10),
-            objective=(updated.get('objective') or 'croissance')
-        )
+        _invalidate_portfolio(portfolio_id)
+        
+        return _profile_response(updated)
 
     except PermissionError:
         raise HTTPException(status_code=403, detail="Forbidden")
@@ -560,54 +795,33 @@ async def get_portfolio_score_endpoint(
     try:
         # Ownership/auth check: if the caller provided a Bearer token, validate
         # that the token belongs to the user owning the portfolio.
-        auth_header = request.headers.get('authorization')
         user_id = None
-        if auth_header and auth_header.lower().startswith('bearer '):
-            token = auth_header.split(' ', 1)[1]
+        token = _extract_bearer_token(request)
+        if token:
             try:
-                # supabase.auth.get_user may return a dict-like or object with 'user'
-                user_resp = supabase.auth.get_user(token)
-                # handle sync/async client shapes
-                if isinstance(user_resp, dict) and 'user' in user_resp:
-                    user_obj = user_resp['user']
-                else:
-                    # Some clients return an object with .user
-                    user_obj = getattr(user_resp, 'user', None)
-                
-                # Extract the actual user ID string from the user object
-                if user_obj:
-                    if isinstance(user_obj, dict):
-                        user_id = user_obj.get('id')
-                    elif hasattr(user_obj, 'id'):
-                        user_id = user_obj.id if isinstance(user_obj.id, str) else str(user_obj.id)
-                    else:
-                        user_id = None
+                user_id = await _resolve_user_id(supabase, token)
             except Exception as e:
                 # If user resolution fails, treat as anonymous (no user_id)
                 logger.warning(f"Failed to resolve user from token: {e}")
                 user_id = None
 
-        # Fetch portfolio to check ownership
-        presp = supabase.table('portfolios').select('id, client_id').eq('id', portfolio_id).execute()
-        if not presp.data:
-            raise HTTPException(status_code=404, detail=f"Portfolio {portfolio_id} not found")
-
-        portfolio = presp.data[0]
-
-        settings = get_settings()
-        if user_id and not settings.SKIP_OWNERSHIP_CHECK:
-            # resolve client owner
-            client_resp = supabase.table('clients').select('user_id').eq('id', portfolio.get('client_id')).execute()
-            client_user_id = client_resp.data[0].get('user_id') if client_resp and client_resp.data else None
-            logger.info(f"🔐 Ownership check: token user_id={user_id}, client user_id={client_user_id}")
-            if client_user_id and client_user_id != user_id:
-                logger.warning(f"❌ Forbidden: user {user_id} tried to access portfolio owned by {client_user_id}")
-                raise HTTPException(status_code=403, detail='Forbidden')
-        elif settings.SKIP_OWNERSHIP_CHECK:
-            logger.warning(f"⚠️  SKIP_OWNERSHIP_CHECK=True - Allowing access without ownership validation (DEV ONLY!)")
-
+        # Ownership was already checked when this (portfolio, user) entry was cached
+        cache_key = _cache_key(portfolio_id, user_id)
+        cached = _SCORE_CACHE.get(cache_key)
+        if cached is not None:
+            return _etag_response(request, cached)
+        
+        # The ownership check happens in compute_portfolio_score (through
+        # get_portfolio_profile, concurrently with the positions query):
+        # PermissionError -> 403, unknown portfolio (ValueError) -> 404
         result = await compute_portfolio_score(portfolio_id, user_id or "")
-        return result
+        content = _SCORE_ADAPTER.dump_json(_SCORE_ADAPTER.validate_python(result))
+        _SCORE_CACHE.set(cache_key, content)
+        return _etag_response(request, content)
+    except PermissionError:
+        raise HTTPException(status_code=403, detail="Forbidden")
+    except ValueError:
+        raise HTTPException(status_code=404, detail=f"Portfolio {portfolio_id} not found")
     except HTTPException:
         raise
     except Exception as e:
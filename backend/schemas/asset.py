@@ -5,12 +5,50 @@ These Pydantic models define the structure of asset-related data
 for API requests and responses.
 """
 
-from pydantic import BaseModel, Field, field_validator
-from typing import Optional
+import re
+from pydantic import BaseModel, Field, PlainSerializer, field_validator
+from pydantic.dataclasses import dataclass
+from typing import Annotated, Optional
 from datetime import datetime
 from decimal import Decimal
 
 
+# Decimal emitted as a JSON number (float) instead of pydantic's default string.
+# Replaces the deprecated per-model `json_encoders`; applies to model_dump_json,
+# TypeAdapter.dump_json and FastAPI's response serialization alike.
+JsonDecimal = Annotated[Decimal, PlainSerializer(float, return_type=float, when_used='json')]
+
+# ISIN: 2-letter country code + 9 alphanumeric characters + 1 check digit.
+# Compiled once; also applied column-wise by the CSV import (Series.str.match).
+ISIN_PATTERN = re.compile(r'^[A-Z]{2}[A-Z0-9]{9}\d$')
+
+
+def isin_has_valid_check_digit(isin: str) -> bool:
+    """
+    Verify the ISO 6166 check digit of a well-formed ISIN.
+    
+    Letters are expanded to two digits (A=10 ... Z=35), then the Luhn
+    (mod 10) checksum is computed over the resulting digit string.
+    
+    Args:
+        isin: ISIN already matching ISIN_PATTERN
+    
+    Returns:
+        True if the last digit matches the checksum of the first 11 characters
+    """
+    digits = ''.join(str(int(c, 36)) for c in isin)
+    total = 0
+    # Double every second digit starting from the rightmost one's neighbour
+    for i, ch in enumerate(reversed(digits)):
+        d = int(ch)
+        if i % 2:
+            d *= 2
+            if d > 9:
+                d -= 9
+        total += d
+    return total % 10 == 0
+
+
 class AssetBase(BaseModel):
     """Base asset model with common fields"""
     isin: str = Field(..., min_length=12, max_length=12, description="ISIN code (12 characters)")
@@ -25,17 +63,22 @@ class AssetBase(BaseModel):
     @classmethod
     def validate_isin(cls, v: str) -> str:
         """Validate ISIN format"""
-        if not v or len(v) != 12:
-            raise ValueError('ISIN must be exactly 12 characters')
-        # Basic ISIN format: 2 letters + 9 alphanumeric + 1 check digit
-        if not v[:2].isalpha():
-            raise ValueError('ISIN must start with 2 letters (country code)')
-        return v.upper()
+        v = v.upper()
+        if not ISIN_PATTERN.match(v):
+            raise ValueError(f'Invalid ISIN: {v}')
+        return v
 
 
 class AssetCreate(AssetBase):
     """Schema for creating a new asset"""
-    pass
+    
+    @field_validator('isin')
+    @classmethod
+    def validate_isin_check_digit(cls, v: str) -> str:
+        """Reject mistyped ISINs before they reach the database"""
+        if not isin_has_valid_check_digit(v):
+            raise ValueError(f'Invalid ISIN check digit: {v}')
+        return v
 
 
 class AssetUpdate(BaseModel):
@@ -58,11 +101,11 @@ class AssetUpdate(BaseModel):
 class AssetEnriched(AssetBase):
     """Schema for asset with market data (full enrichment)"""
     id: str = Field(..., description="Asset UUID")
-    last_price: Optional[Decimal] = Field(None, description="Current market price")
-    previous_close: Optional[Decimal] = Field(None, description="Previous closing price")
-    price_change_pct: Optional[Decimal] = Field(None, description="Daily price change %")
-    perf_1y: Optional[Decimal] = Field(None, description="1-year performance %")
-    volatility_1y: Optional[Decimal] = Field(None, description="1-year volatility %")
+    last_price: Optional[JsonDecimal] = Field(None, description="Current market price")
+    previous_close: Optional[JsonDecimal] = Field(None, description="Previous closing price")
+    price_change_pct: Optional[JsonDecimal] = Field(None, description="Daily price change %")
+    perf_1y: Optional[JsonDecimal] = Field(None, description="1-year performance %")
+    volatility_1y: Optional[JsonDecimal] = Field(None, description="1-year volatility %")
     market_cap: Optional[int] = Field(None, description="Market capitalization")
     data_source: str = Field(default="manual", description="Data source: manual, yahoo, fmp")
     last_updated: Optional[datetime] = Field(None, description="Last market data update")
@@ -73,7 +116,9 @@ class AssetEnriched(AssetBase):
         from_attributes = True  # Pydantic v2: allows ORM mode
 
 
-class AssetSummary(BaseModel):
+# One per listed position: slotted frozen dataclass (no per-instance __dict__)
+@dataclass(slots=True, frozen=True)
+class AssetSummary:
     """Lightweight asset summary (for lists)"""
     id: str
     isin: str
@@ -81,14 +126,9 @@ class AssetSummary(BaseModel):
     name: str
     sector: Optional[str]
     region: Optional[str]
-    last_price: Optional[Decimal]
-    perf_1y: Optional[Decimal]
+    last_price: Optional[JsonDecimal]
+    perf_1y: Optional[JsonDecimal]
     last_updated: Optional[datetime]
-    
-    class Config:
-        json_encoders = {
-            Decimal: float  # Convert Decimal to float for JSON serialization
-        }
 
 
 class EnrichmentResult(BaseModel):
@@ -5,11 +5,11 @@ These Pydantic models define the structure of portfolio-related data
 for API requests and responses.
 """
 
-from pydantic import BaseModel, Field, field_validator
+from pydantic import BaseModel, Field, model_validator
 from typing import Optional, List
 from datetime import date as date_type, datetime
 from decimal import Decimal
-from schemas.asset import AssetEnriched, AssetSummary
+from schemas.asset import AssetEnriched, AssetSummary, JsonDecimal
 
 
 class PositionBase(BaseModel):
@@ -21,9 +21,9 @@ class PositionBase(BaseModel):
     isin: Optional[str] = Field(None, description="ISIN code (optional)")
     region: str = Field(..., description="Geographic region")
     currency: str = Field(default="EUR", description="Currency code")
-    quantity: Optional[Decimal] = Field(None, description="Quantity held")
-    purchase_price: Optional[Decimal] = Field(None, description="Purchase price per unit")
-    current_value: Decimal = Field(..., description="Current total value")
+    quantity: Optional[JsonDecimal] = Field(None, description="Quantity held")
+    purchase_price: Optional[JsonDecimal] = Field(None, description="Purchase price per unit")
+    current_value: JsonDecimal = Field(..., description="Current total value")
     notes: Optional[str] = Field(None, description="Additional notes")
 
 
@@ -32,45 +32,6 @@ class PositionCreate(PositionBase):
     portfolio_id: str = Field(..., description="Portfolio UUID")
 
 
-class PositionCSVRow(BaseModel):
-    """
-    Schema for a single row from CSV import.
-    
-    Expected CSV format:
-    date,provider,asset_class,instrument_name,isin,region,currency,current_value
-    """
-    date: str = Field(..., description="Date in YYYY-MM-DD format")
-    provider: str
-    asset_class: str
-    instrument_name: str
-    isin: Optional[str] = None
-    region: str
-    currency: str = "EUR"
-    current_value: str = Field(..., description="Numeric value as string")
-    quantity: Optional[str] = None
-    purchase_price: Optional[str] = None
-    
-    @field_validator('date')
-    @classmethod
-    def validate_date(cls, v: str) -> str:
-        """Validate date format"""
-        try:
-            date_type.fromisoformat(v)
-            return v
-        except ValueError:
-            raise ValueError(f'Invalid date format: {v}. Expected YYYY-MM-DD')
-    
-    @field_validator('current_value')
-    @classmethod
-    def validate_current_value(cls, v: str) -> str:
-        """Validate that current_value is numeric"""
-        try:
-            float(v.replace(',', '.'))
-            return v
-        except ValueError:
-            raise ValueError(f'Invalid numeric value: {v}')
-
-
 class Position(PositionBase):
     """Full position model with ID and timestamps"""
     id: str
@@ -81,14 +42,40 @@ class Position(PositionBase):
     
     class Config:
         from_attributes = True
-        json_encoders = {
-            Decimal: float  # Convert Decimal to float for JSON serialization
-        }
 
 
 class PositionEnriched(Position):
     """Position with enriched asset data"""
     asset: Optional[AssetSummary] = None
+    
+    @model_validator(mode='before')
+    @classmethod
+    def nest_asset_from_view_row(cls, data):
+        """
+        Accept a flat `positions_enriched` view row.
+        
+        The view exposes asset columns next to position columns (asset_name,
+        asset_region, market_data_updated_at, ...); they are grouped here into
+        the nested `asset` summary when the position is linked to an asset.
+        """
+        if not isinstance(data, dict) or 'asset' in data:
+            return data
+        
+        # Runs once per row: bind the lookup instead of resolving data.get each time
+        get = data.get
+        asset_id = get('asset_id')
+        asset = None if not asset_id else {
+            'id': asset_id,
+            'isin': get('isin'),  # ISIN comes directly from position
+            'ticker': get('ticker'),
+            'name': get('asset_name'),
+            'sector': get('sector'),
+            'region': get('asset_region'),
+            'last_price': get('last_price'),
+            'perf_1y': get('perf_1y'),
+            'last_updated': get('market_data_updated_at')
+        }
+        return {**data, 'asset': asset}
 
 
 class PortfolioBase(BaseModel):
@@ -134,7 +121,7 @@ class Portfolio(PortfolioBase):
 class PortfolioWithPositions(Portfolio):
     """Portfolio with its positions"""
     positions: List[PositionEnriched] = []
-    total_value: Decimal = Field(default=Decimal('0'), description="Sum of all position values")
+    total_value: JsonDecimal = Field(default=Decimal('0'), description="Sum of all position values")
     positions_count: int = Field(default=0, description="Number of positions")
 
 
@@ -156,7 +143,7 @@ class CSVImportResult(BaseModel):
     rows_imported: int
     rows_failed: int
     errors: List[CSVImportError] = []
-    enrichment: Optional[dict] = None  # Result from enrichment service
+    enrichment: Optional[dict] = None  # Enrichment status ({'status': 'queued'})
 
 
 class EnrichPortfolioResult(BaseModel):
@@ -2,12 +2,16 @@
 Schemas related to investor profile management
 """
 
-from pydantic import BaseModel, Field
+from pydantic import BaseModel, ConfigDict, Field
 from typing import Optional
 
 
 class InvestorProfileUpdate(BaseModel):
     """Payload for updating a portfolio's investor profile (MVP)."""
+    # Strings are trimmed once here; investor_profile stays a free string because
+    # services.profile.normalize_profile_name maps accented/alias spellings
+    model_config = ConfigDict(str_strip_whitespace=True, extra='ignore', frozen=True)
+    
     investor_profile: Optional[str] = Field(None, description='"prudent" | "equilibre" | "dynamique" | "agressif"')
     target_equity_pct: Optional[float] = Field(None, description="Custom target equity percentage (overrides profile default)", ge=0, le=100)
     investment_horizon_years: Optional[int] = Field(None, description="Investment horizon in years", ge=1)
@@ -3,17 +3,22 @@ Schemas for portfolio scoring results
 """
 
 from pydantic import BaseModel, Field
+from pydantic.dataclasses import dataclass
 from typing import List, Optional, Literal
 
 
-class SubScore(BaseModel):
+# Read-only DTOs built in bulk by the scoring service: slotted frozen
+# dataclasses (no per-instance __dict__) instead of BaseModel
+@dataclass(slots=True, frozen=True)
+class SubScore:
     """A sub-score component (0-100) with description."""
     name: str = Field(..., description="Sub-score name: diversification, risk_profile, macro_exposure, asset_quality")
     value: float = Field(..., ge=0, le=100, description="Score value 0-100")
     description: str = Field(..., description="Human-readable explanation of the score")
 
 
-class Alert(BaseModel):
+@dataclass(slots=True, frozen=True)
+class Alert:
     """An alert generated by the scoring system."""
     code: str = Field(..., description="Alert code (e.g., HIGH_CONCENTRATION, RISK_PROFILE_MISMATCH)")
     severity: Literal["red", "orange", "green"] = Field(..., description="Alert severity level")
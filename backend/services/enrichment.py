@@ -11,18 +11,47 @@ Key features:
 - Handle rate limiting and errors gracefully
 """
 
-import yfinance as yf
-from typing import Optional, Dict, List
-from datetime import datetime, timedelta
+from typing import Optional, Dict, List, Set
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime, timezone
 from decimal import Decimal
+import asyncio
+import hashlib
 import logging
-import time
+
+from postgrest.exceptions import APIError
+from postgrest.types import ReturnMethod
 
 from utils.supabase_client import get_supabase
+from utils.db import sb_execute
+from utils.rate_limit import RateLimiter
+from utils.market_cache import MarketDataCache, PROFILE_TABLE, SNAPSHOT_TABLE
+from utils.yahoo_chart import create_chart_client, fetch_daily_closes_many
 from config import settings
+import lazy_imports
 
 logger = logging.getLogger(__name__)
 
+# Keep-alive connections kept per host by the shared Yahoo Finance session
+_HTTP_POOL_SIZE = 32
+
+# Transient Yahoo responses retried by the session (throttling, gateway errors)
+_HTTP_RETRY_STATUSES = (429, 502, 503)
+
+# Price history window used for perf_1y / volatility_1y (Yahoo range keyword)
+_HISTORY_PERIOD = '1y'
+
+# Postgres undefined_column: assets.series_hash comes from
+# sql/supabase-migration-performance.sql, required by enrichment
+_UNDEFINED_COLUMN = '42703'
+
+# assets columns written back from a market data dict
+_ASSET_UPDATE_FIELDS = (
+    'name', 'ticker', 'asset_type', 'sector', 'region', 'currency',
+    'last_price', 'previous_close', 'price_change_pct', 'perf_1y',
+    'volatility_1y', 'market_cap', 'data_source', 'last_updated', 'series_hash'
+)
+
 
 class MarketDataService:
     """
@@ -32,6 +61,40 @@ class MarketDataService:
     def __init__(self):
         self.supabase = get_supabase()
         self.rate_limit_delay = settings.API_RATE_LIMIT_DELAY
+        self.max_concurrency = settings.ENRICHMENT_CONCURRENCY
+        # Shared by all worker threads and chart coroutines: Yahoo requests
+        # start at most once per API_RATE_LIMIT_DELAY, without a blocking
+        # sleep after each asset
+        self.rate_limiter = RateLimiter(self.rate_limit_delay)
+        
+        # Pooled async client for chart requests, created on first use and
+        # kept across enrichment runs of the same event loop (see
+        # _get_chart_client)
+        self._chart_client = None
+        self._chart_loop = None
+        
+        # Persistent Yahoo results (disabled when MARKET_DATA_CACHE_PATH is empty)
+        self.cache = MarketDataCache(settings.MARKET_DATA_CACHE_PATH) if settings.MARKET_DATA_CACHE_PATH else None
+        self.snapshot_max_age = settings.MARKET_DATA_STALE_HOURS * 3600
+        self.profile_max_age = settings.MARKET_PROFILE_CACHE_DAYS * 86400
+        
+        # One pooled HTTP session for every yfinance call: DNS + TLS handshakes
+        # are paid once per host instead of once per asset. Throttled or
+        # gateway-failed requests are retried with exponential backoff; the
+        # last response is handed back to yfinance instead of raising.
+        requests = lazy_imports.requests
+        self.http_session = requests.Session()
+        adapter = requests.adapters.HTTPAdapter(
+            pool_connections=_HTTP_POOL_SIZE,
+            pool_maxsize=_HTTP_POOL_SIZE,
+            max_retries=requests.adapters.Retry(
+                total=3,
+                backoff_factor=1.5,
+                status_forcelist=_HTTP_RETRY_STATUSES,
+                raise_on_status=False
+            )
+        )
+        self.http_session.mount('https://', adapter)
         
         # ISIN to Yahoo Finance ticker mapping
         # This is a simplified mapping - in production, you'd want a more complete database
@@ -49,6 +112,17 @@ class MarketDataService:
             # Add more mappings as needed
         }
         
+        # Heuristic ticker per ISIN country prefix (first 2 characters)
+        self._prefix_handlers = {
+            # French securities - try .PA suffix (Euronext Paris)
+            'FR': lambda isin: f"{isin}.PA",
+            # US securities - try without suffix
+            # Note: This is very simplified, real implementation needs proper mapping
+            'US': lambda isin: isin[2:10],  # Extract middle part
+            # German securities - try .DE suffix (Xetra)
+            'DE': lambda isin: f"{isin}.DE",
+        }
+        
         # Region mapping from country names
         self.country_to_region = {
             'United States': 'USA',
@@ -77,22 +151,16 @@ class MarketDataService:
             Yahoo Finance ticker or None if not found
         """
         # Check explicit mapping first
-        if isin in self.isin_to_ticker_map:
-            return self.isin_to_ticker_map[isin]
+        ticker_symbol = self.isin_to_ticker_map.get(isin)
+        if ticker_symbol is not None:
+            return ticker_symbol
         
         # Try heuristic rules for common patterns
-        if isin.startswith('FR'):
-            # French securities - try .PA suffix (Euronext Paris)
-            return f"{isin}.PA"
-        elif isin.startswith('US'):
-            # US securities - try without suffix
-            # Note: This is very simplified, real implementation needs proper mapping
-            return isin[2:10]  # Extract middle part
-        elif isin.startswith('DE'):
-            # German securities - try .DE suffix (Xetra)
-            return f"{isin}.DE"
+        handler = self._prefix_handlers.get(isin[:2])
+        if handler is not None:
+            return handler(isin)
         
-        logger.warning(f"No ticker mapping found for ISIN: {isin}")
+        logger.warning("No ticker mapping found for ISIN: %s", isin)
         return None
     
     def map_country_to_region(self, country: Optional[str]) -> str:
@@ -110,78 +178,259 @@ class MarketDataService:
         
         return self.country_to_region.get(country, 'Autres')
     
-    def fetch_market_data(self, isin: str) -> Optional[Dict]:
+    async def fetch_market_data_batch(self, isins: List[str], info_isins: Optional[Set[str]] = None) -> Dict[str, Dict]:
         """
-        Fetch market data for a given ISIN from Yahoo Finance.
+        Fetch market data for several ISINs concurrently.
+        
+        Price histories come straight from Yahoo's chart endpoint (see
+        `utils.yahoo_chart`), up to `ENRICHMENT_CONCURRENCY` in flight and
+        paced by the shared rate limiter. The previous close comes from that
+        same series and the market cap from the share count
+        (`Ticker.fast_info.shares`, stocks only) times the last close, so
+        both are refreshed with every new series.
+        
+        Descriptive fields (name, sector, type, currency...) need the heavy
+        `Ticker.info` request. It is made, on a worker thread pool, only for
+        tickers whose cached profile is missing or older than
+        MARKET_PROFILE_CACHE_DAYS (every run when the cache is disabled).
+        Price metrics are served from the cache for MARKET_DATA_STALE_HOURS.
         
         Args:
-            isin: ISIN code
+            isins: ISIN codes to fetch
+            info_isins: ISINs whose descriptive fields are returned even when
+                served from the cache (default: all of them). Freshly fetched
+                descriptive fields are always returned.
         
         Returns:
-            Dictionary with market data or None on error
+            Dictionary ISIN -> market data, without the ISINs for which no
+            price history was found. Entries without descriptive fields only
+            carry the ticker and price/performance fields.
         """
-        ticker_symbol = self.isin_to_ticker(isin)
+        symbols_by_isin = {}
+        for isin in dict.fromkeys(isins):
+            ticker_symbol = self.isin_to_ticker(isin)
+            if ticker_symbol:
+                symbols_by_isin[isin] = ticker_symbol
+            else:
+                logger.warning("Cannot fetch data for %s: No ticker mapping", isin)
         
-        if not ticker_symbol:
-            logger.warning(f"Cannot fetch data for {isin}: No ticker mapping")
-            return None
+        if not symbols_by_isin:
+            return {}
         
-        try:
-            logger.info(f"Fetching market data for {isin} (ticker: {ticker_symbol})")
-            
-            # Fetch ticker info
-            ticker = yf.Ticker(ticker_symbol)
-            info = ticker.info
-            
-            if not info or 'symbol' not in info:
-                logger.warning(f"No data returned for ticker {ticker_symbol}")
-                return None
-            
-            # Fetch 1-year historical data
-            end_date = datetime.now()
-            start_date = end_date - timedelta(days=365)
-            
-            hist = ticker.history(start=start_date, end=end_date)
-            
-            if hist.empty:
-                logger.warning(f"No historical data for {ticker_symbol}")
-                return None
-            
-            # Calculate performance metrics
-            first_close = float(hist['Close'].iloc[0])
-            last_close = float(hist['Close'].iloc[-1])
-            perf_1y = ((last_close - first_close) / first_close) * 100
-            
-            # Calculate volatility (annualized standard deviation of returns)
-            returns = hist['Close'].pct_change().dropna()
-            volatility_1y = float(returns.std() * (252 ** 0.5) * 100)  # 252 trading days
-            
-            # Extract relevant info
-            market_data = {
-                'isin': isin,
-                'ticker': ticker_symbol,
-                'name': info.get('longName') or info.get('shortName') or f"Asset {isin}",
-                'asset_type': self._determine_asset_type(info),
-                'sector': info.get('sector'),
-                'region': self.map_country_to_region(info.get('country')),
-                'currency': info.get('currency', 'EUR'),
-                'last_price': round(float(last_close), 4),
-                'previous_close': round(float(info.get('previousClose', last_close)), 4),
-                'price_change_pct': round(((last_close - float(info.get('previousClose', last_close))) / float(info.get('previousClose', last_close))) * 100, 4) if info.get('previousClose') else 0,
-                'perf_1y': round(perf_1y, 2),
-                'volatility_1y': round(volatility_1y, 2),
-                'market_cap': info.get('marketCap'),
-                'data_source': 'yahoo',
-                'last_updated': datetime.utcnow().isoformat()
-            }
+        isin_by_symbol = {}
+        for isin, ticker_symbol in symbols_by_isin.items():
+            isin_by_symbol.setdefault(ticker_symbol, isin)
+        symbols = list(isin_by_symbol)
+        
+        # Cached price metrics and profiles (ticker -> fields)
+        snapshots = {}
+        profiles = {}
+        if self.cache is not None:
+            for ticker_symbol in symbols:
+                snapshot = self.cache.get(SNAPSHOT_TABLE, ticker_symbol, self.snapshot_max_age)
+                if snapshot is not None:
+                    snapshots[ticker_symbol] = snapshot
+                profile = self.cache.get(PROFILE_TABLE, ticker_symbol, self.profile_max_age)
+                if profile is not None:
+                    profiles[ticker_symbol] = profile
+        
+        # One clock read per batch: same last_updated stamp for every ticker
+        fetched_at = datetime.now(timezone.utc).isoformat()
+        
+        # Close series per ticker, fetched concurrently on the event loop
+        to_download = [ticker_symbol for ticker_symbol in symbols if ticker_symbol not in snapshots]
+        logger.debug("Downloading 1y history for %s tickers", len(to_download))
+        closes_by_symbol = {}
+        if to_download:
+            closes_by_symbol = await fetch_daily_closes_many(
+                self._get_chart_client(), to_download, self.max_concurrency,
+                period=_HISTORY_PERIOD, rate_limiter=self.rate_limiter
+            )
+        
+        new_snapshots = {
+            ticker_symbol: self._price_snapshot(ticker_symbol, closes, fetched_at)
+            for ticker_symbol, closes in closes_by_symbol.items()
+        }
+        snapshots.update(new_snapshots)
+        
+        # yfinance is synchronous: info and share count requests run on a
+        # dedicated thread pool (paced by the shared rate limiter) without
+        # blocking the loop
+        info_symbols = [
+            ticker_symbol for ticker_symbol in symbols
+            if ticker_symbol in snapshots and ticker_symbol not in profiles
+        ]
+        refreshed_profiles = set()
+        loop = asyncio.get_running_loop()
+        with ThreadPoolExecutor(max_workers=self.max_concurrency) as executor:
+            if info_symbols:
+                infos = await asyncio.gather(*(
+                    loop.run_in_executor(executor, self._fetch_info, ticker_symbol)
+                    for ticker_symbol in info_symbols
+                ))
+                for ticker_symbol, info in zip(info_symbols, infos):
+                    if info is None:
+                        continue
+                    profiles[ticker_symbol] = self._descriptive_fields(isin_by_symbol[ticker_symbol], info)
+                    refreshed_profiles.add(ticker_symbol)
+                    if self.cache is not None:
+                        self.cache.set(PROFILE_TABLE, ticker_symbol, profiles[ticker_symbol])
             
-            logger.info(f"✅ Successfully fetched data for {isin}: {market_data['name']}")
-            return market_data
+            # Funds and ETFs have no share count: only stocks (or tickers not
+            # described yet) are asked for one
+            shares_symbols = [
+                ticker_symbol for ticker_symbol in new_snapshots
+                if profiles.get(ticker_symbol, {}).get('asset_type', 'stock') == 'stock'
+            ]
+            if shares_symbols:
+                shares = await asyncio.gather(*(
+                    loop.run_in_executor(executor, self._fetch_shares, ticker_symbol)
+                    for ticker_symbol in shares_symbols
+                ))
+                for ticker_symbol, share_count in zip(shares_symbols, shares):
+                    if share_count:
+                        snapshot = new_snapshots[ticker_symbol]
+                        snapshot['market_cap'] = round(share_count * snapshot['last_price'])
+        
+        if self.cache is not None:
+            for ticker_symbol, snapshot in new_snapshots.items():
+                self.cache.set(SNAPSHOT_TABLE, ticker_symbol, snapshot)
+        
+        results = {}
+        for isin, ticker_symbol in symbols_by_isin.items():
+            snapshot = snapshots.get(ticker_symbol)
+            if snapshot is None:
+                logger.warning("No historical data for %s", ticker_symbol)
+                continue
             
+            # Price fields win over the profile (fresher market cap)
+            market_data = {}
+            if info_isins is None or isin in info_isins or ticker_symbol in refreshed_profiles:
+                market_data.update(profiles.get(ticker_symbol, {}))
+            market_data.update(snapshot)
+            market_data['isin'] = isin
+            results[isin] = market_data
+        
+        logger.info("✅ Fetched market data for %s/%s ISINs", len(results), len(symbols_by_isin))
+        return results
+    
+    def _get_chart_client(self):
+        """
+        Return the pooled chart client of the running event loop.
+        
+        An httpx.AsyncClient is bound to the loop it first ran on, so a
+        caller running `asyncio.run` several times (CLI, tests) gets a new
+        client per loop instead of one whose pool belongs to a closed loop.
+        The client of a previous loop is dropped: its connections cannot be
+        closed from another loop.
+        """
+        loop = asyncio.get_running_loop()
+        if self._chart_client is None or self._chart_loop is not loop:
+            self._chart_client = create_chart_client(self.max_concurrency)
+            self._chart_loop = loop
+        return self._chart_client
+    
+    def _fetch_info(self, ticker_symbol: str) -> Optional[Dict]:
+        """
+        Fetch the descriptive fields of a ticker (rate limited).
+        
+        Returns:
+            Yahoo Finance info dict, or None if unavailable
+        """
+        self.rate_limiter.acquire()
+        try:
+            info = lazy_imports.yfinance.Ticker(ticker_symbol, session=self.http_session).info
+        except Exception as e:
+            logger.warning("Could not fetch info for %s: %s", ticker_symbol, e)
+            info = None
+        
+        if not info or 'symbol' not in info:
+            logger.warning("No info returned for ticker %s, refreshing prices only", ticker_symbol)
+            return None
+        return info
+    
+    def _fetch_shares(self, ticker_symbol: str) -> Optional[int]:
+        """
+        Fetch the share count of a ticker (rate limited).
+        
+        Only `fast_info.shares` is read: `fast_info.market_cap` would add a
+        price history request and fall back to `Ticker.info` when Yahoo has
+        no share count.
+        
+        Returns:
+            Number of shares outstanding, or None if unavailable
+        """
+        self.rate_limiter.acquire()
+        try:
+            return lazy_imports.yfinance.Ticker(ticker_symbol, session=self.http_session).fast_info.shares
         except Exception as e:
-            logger.error(f"❌ Error fetching market data for {isin}: {e}")
+            logger.warning("Could not fetch share count for %s: %s", ticker_symbol, e)
             return None
     
+    def _price_snapshot(self, ticker_symbol: str, closes, fetched_at: str) -> Dict:
+        """
+        Compute price/performance metrics from a close series.
+        
+        The previous close is the second-to-last close of the series, so no
+        quote request is needed.
+        
+        Args:
+            ticker_symbol: Yahoo Finance ticker
+            closes: Daily close prices over one year (pandas Series or float array)
+            fetched_at: ISO 8601 UTC timestamp stored as last_updated
+        
+        Returns:
+            Price metrics dictionary (no ISIN, no descriptive fields), with
+            `series_hash` fingerprinting the close series they derive from
+        """
+        np = lazy_imports.numpy
+        
+        # Work on the raw float64 buffer: no Series alignment or NaN bookkeeping
+        prices = np.asarray(closes, dtype=np.float64)
+        
+        # Calculate performance metrics
+        first_close = float(prices[0])
+        last_close = float(prices[-1])
+        perf_1y = ((last_close - first_close) / first_close) * 100
+        
+        # Calculate volatility (annualized standard deviation of returns)
+        returns = np.diff(prices) / prices[:-1]
+        volatility_1y = float(returns.std(ddof=1) * np.sqrt(252) * 100) if returns.size > 1 else 0.0  # 252 trading days
+        
+        previous_close = float(prices[-2]) if prices.size > 1 else last_close
+        
+        return {
+            'ticker': ticker_symbol,
+            'last_price': round(float(last_close), 4),
+            'previous_close': round(previous_close, 4),
+            'price_change_pct': round(((last_close - previous_close) / previous_close) * 100, 4) if previous_close else 0,
+            'perf_1y': round(perf_1y, 2),
+            'volatility_1y': round(volatility_1y, 2),
+            'data_source': 'yahoo',
+            'last_updated': fetched_at,
+            'series_hash': hashlib.blake2b(prices.tobytes(), digest_size=8).hexdigest()
+        }
+    
+    def _descriptive_fields(self, isin: str, info: Dict) -> Dict:
+        """
+        Extract the slow-changing asset fields from a Yahoo Finance info dict.
+        
+        Args:
+            isin: ISIN code (used in the fallback name)
+            info: Yahoo Finance info dict
+        
+        Returns:
+            name, asset_type, sector, region, currency and market_cap
+        """
+        return {
+            'name': info.get('longName') or info.get('shortName') or f"Asset {isin}",
+            'asset_type': self._determine_asset_type(info),
+            'sector': info.get('sector'),
+            'region': self.map_country_to_region(info.get('country')),
+            'currency': info.get('currency', 'EUR'),
+            'market_cap': info.get('marketCap'),
+        }
+    
     def _determine_asset_type(self, info: Dict) -> str:
         """
         Determine asset type from Yahoo Finance info.
@@ -205,109 +454,112 @@ class MarketDataService:
         
         return 'other'
     
-    def enrich_asset(self, asset_id: str) -> bool:
-        """
-        Enrich a single asset with market data.
-        
-        Args:
-            asset_id: UUID of the asset to enrich
-        
-        Returns:
-            True if successful, False otherwise
-        """
-        try:
-            # Fetch asset from database
-            response = self.supabase.table('assets').select('*').eq('id', asset_id).execute()
-            
-            if not response.data:
-                logger.error(f"Asset {asset_id} not found")
-                return False
-            
-            asset = response.data[0]
-            isin = asset['isin']
-            
-            # Fetch market data
-            market_data = self.fetch_market_data(isin)
-            
-            if not market_data:
-                return False
-            
-            # Update asset in database
-            update_data = {
-                'name': market_data['name'],
-                'ticker': market_data['ticker'],
-                'asset_type': market_data['asset_type'],
-                'sector': market_data['sector'],
-                'region': market_data['region'],
-                'currency': market_data['currency'],
-                'last_price': market_data['last_price'],
-                'previous_close': market_data['previous_close'],
-                'price_change_pct': market_data['price_change_pct'],
-                'perf_1y': market_data['perf_1y'],
-                'volatility_1y': market_data['volatility_1y'],
-                'market_cap': market_data['market_cap'],
-                'data_source': market_data['data_source'],
-                'last_updated': market_data['last_updated']
-            }
-            
-            self.supabase.table('assets').update(update_data).eq('id', asset_id).execute()
-            
-            logger.info(f"✅ Asset {asset_id} enriched successfully")
-            
-            # Rate limiting
-            time.sleep(self.rate_limit_delay)
-            
-            return True
-            
-        except Exception as e:
-            logger.error(f"❌ Error enriching asset {asset_id}: {e}")
-            return False
-    
-    def enrich_portfolio_assets(self, portfolio_id: str) -> Dict:
+    async def enrich_portfolio_assets(self, portfolio_id: str) -> Dict:
         """
         Enrich all assets in a portfolio.
         
+        Market data for all assets is fetched in one batch (see
+        `fetch_market_data_batch`, which refetches descriptive fields once
+        their cached profile is older than MARKET_PROFILE_CACHE_DAYS). Cached
+        descriptive fields are only written for assets that have never been
+        described (no sector yet). Asset rows are then written back with one
+        bulk upsert per row shape instead of one UPDATE per asset. Price-only
+        rows whose close series matches the stored `series_hash` only get
+        their `last_updated` stamp (and market cap, when known) written:
+        every other derived field is unchanged.
+        
         Args:
             portfolio_id: UUID of the portfolio
         
         Returns:
             Dictionary with enrichment results
+        
+        Raises:
+            ValueError: If the portfolio does not exist
+            RuntimeError: If assets.series_hash is missing (migration not applied)
         """
         try:
             # Get all positions with asset_id for this portfolio
-            response = self.supabase.table('positions') \
-                .select('asset_id, isin') \
-                .eq('portfolio_id', portfolio_id) \
-                .not_.is_('asset_id', 'null') \
-                .execute()
+            try:
+                response = await sb_execute(
+                    self.supabase.table('positions')
+                    .select('asset_id, assets(isin, name, sector, series_hash)')
+                    .eq('portfolio_id', portfolio_id)
+                    .not_.is_('asset_id', 'null')
+                )
+            except APIError as e:
+                if e.code == _UNDEFINED_COLUMN:
+                    raise RuntimeError(
+                        "assets.series_hash is missing: apply sql/supabase-migration-performance.sql"
+                    ) from e
+                raise
             
             if not response.data:
-                logger.warning(f"No positions with assets found for portfolio {portfolio_id}")
+                # Only an empty result needs the existence check
+                portfolio_response = await sb_execute(
+                    self.supabase.table('portfolios').select('id', head=True, count='exact').eq('id', portfolio_id)
+                )
+                if not portfolio_response.count:
+                    raise ValueError(f"Portfolio {portfolio_id} not found")
+                
+                logger.warning("No positions with assets found for portfolio %s", portfolio_id)
                 return {'success': 0, 'failed': 0, 'total': 0}
             
-            # Get unique asset IDs
-            asset_ids = list(set([pos['asset_id'] for pos in response.data if pos.get('asset_id')]))
+            # Unique assets (asset_id -> embedded asset row)
+            assets = {pos['asset_id']: pos.get('assets') or {} for pos in response.data if pos.get('asset_id')}
+            isins = [asset['isin'] for asset in assets.values() if asset.get('isin')]
+            info_isins = {asset['isin'] for asset in assets.values() if asset.get('isin') and not asset.get('sector')}
             
-            success_count = 0
-            failed_count = 0
+            market_data = await self.fetch_market_data_batch(isins, info_isins)
             
-            for asset_id in asset_ids:
-                if self.enrich_asset(asset_id):
-                    success_count += 1
+            # Upsert rows grouped by key set: PostgREST sends the union of the
+            # keys as columns and would null out fields missing from a row.
+            # isin and name are NOT NULL, so they travel with every row.
+            rows_by_shape: Dict[tuple, List[Dict]] = {}
+            for asset_id, asset in assets.items():
+                data = market_data.get(asset.get('isin'))
+                if data is None:
+                    continue
+                row = {'id': asset_id, 'isin': asset['isin'], 'name': asset.get('name')}
+                # Descriptive fields travel when the asset was never described
+                # or its profile has just been refetched
+                described = 'asset_type' in data
+                if not described and data.get('series_hash') and data['series_hash'] == asset.get('series_hash'):
+                    # Price-only refresh of the very series already stored (weekend,
+                    # holiday, cached snapshot): every derived field is identical,
+                    # only the refresh stamp (and the share-based market cap) moves
+                    row['last_updated'] = data['last_updated']
+                    if data.get('market_cap') is not None:
+                        row['market_cap'] = data['market_cap']
                 else:
-                    failed_count += 1
+                    row.update((field, data[field]) for field in _ASSET_UPDATE_FIELDS if field in data)
+                rows_by_shape.setdefault(tuple(row), []).append(row)
+            
+            success_count = 0
+            for rows in rows_by_shape.values():
+                try:
+                    await sb_execute(
+                        self.supabase.table('assets')
+                        .upsert(rows, on_conflict='id', returning=ReturnMethod.minimal)
+                    )
+                except Exception as e:
+                    logger.error("❌ Error enriching %s assets: %s", len(rows), e)
+                    continue
+                success_count += len(rows)
             
             result = {
                 'success': success_count,
-                'failed': failed_count,
-                'total': len(asset_ids)
+                'failed': len(assets) - success_count,
+                'total': len(assets)
             }
             
-            logger.info(f"Portfolio {portfolio_id} enrichment complete: {result}")
+            logger.info("Portfolio %s enrichment complete: %s", portfolio_id, result)
             return result
             
+        except (ValueError, RuntimeError):
+            raise
         except Exception as e:
-            logger.error(f"❌ Error enriching portfolio {portfolio_id}: {e}")
+            logger.error("❌ Error enriching portfolio %s: %s", portfolio_id, e)
             return {'success': 0, 'failed': 0, 'total': 0, 'error': str(e)}
 
 
@@ -326,3 +578,27 @@ def get_market_data_service() -> MarketDataService:
     if _market_data_service is None:
         _market_data_service = MarketDataService()
     return _market_data_service
+
+
+async def close_market_data_service() -> None:
+    """
+    Close the pooled HTTP clients of the singleton service, if it was created.
+    
+    Called on application shutdown; a later `get_market_data_service()` call
+    builds a fresh service.
+    """
+    global _market_data_service
+    if _market_data_service is None:
+        return
+    
+    try:
+        _market_data_service.http_session.close()
+        # Only the current loop's client can still be closed (see _get_chart_client)
+        if _market_data_service._chart_loop is asyncio.get_running_loop():
+            await _market_data_service._chart_client.aclose()
+        if _market_data_service.cache is not None:
+            _market_data_service.cache.close()
+    except Exception as e:
+        logger.warning("Could not close market data HTTP session: %s", e)
+    finally:
+        _market_data_service = None
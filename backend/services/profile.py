@@ -5,18 +5,37 @@ Keeps DB interaction out of the router logic.
 """
 
 from typing import Tuple, Optional
+from types import MappingProxyType
 import logging
-from config import get_settings
+from config import settings
+from utils.db import sb_execute
 
 logger = logging.getLogger(__name__)
 
 # Profile to target equity mapping per Sprint 2 requirements
-PROFILE_TARGET_EQUITY = {
+PROFILE_TARGET_EQUITY = MappingProxyType({
     "prudent": 20.0,
     "equilibre": 60.0,
     "dynamique": 80.0,
     "agressif": 90.0,
-}
+})
+
+# Accepted spellings -> canonical profile name (read-only, built once)
+_PROFILE_ALIASES = MappingProxyType({
+    'prudent': 'prudent',
+    'defensif': 'prudent',
+    'equilibre': 'equilibre',
+    'équilibré': 'equilibre',
+    'equilibré': 'equilibre',
+    'dynamique': 'dynamique',
+    'agressif': 'agressif',
+    'aggressif': 'agressif',
+})
+
+# Accepted spelling -> target equity %, so a lookup is a single dict hit
+_TARGET_BY_ALIAS = MappingProxyType({
+    alias: PROFILE_TARGET_EQUITY[canonical] for alias, canonical in _PROFILE_ALIASES.items()
+})
 
 
 def normalize_profile_name(profile: str) -> str:
@@ -30,18 +49,8 @@ def normalize_profile_name(profile: str) -> str:
     """
     normalized = (profile or '').strip().lower()
     
-    # Handle various spellings
-    if normalized in ('prudent', 'defensif'):
-        return 'prudent'
-    if normalized in ('equilibre', 'équilibré', 'equilibré'):
-        return 'equilibre'
-    if normalized == 'dynamique':
-        return 'dynamique'
-    if normalized in ('agressif', 'aggressif'):
-        return 'agressif'
-    
     # Default to equilibre if unknown
-    return 'equilibre'
+    return _PROFILE_ALIASES.get(normalized, 'equilibre')
 
 
 def get_target_equity_for_profile(profile: str) -> float:
@@ -53,8 +62,8 @@ def get_target_equity_for_profile(profile: str) -> float:
     Returns:
         Target equity percentage (20.0, 60.0, 80.0, or 90.0)
     """
-    normalized = normalize_profile_name(profile)
-    return PROFILE_TARGET_EQUITY.get(normalized, 60.0)
+    # Unknown profiles fall back to equilibre (60%), like normalize_profile_name
+    return _TARGET_BY_ALIAS.get((profile or '').strip().lower(), 60.0)
 
 
 async def get_portfolio_profile(supabase, portfolio_id: str, user_id: Optional[str] = None) -> Optional[dict]:
@@ -72,10 +81,12 @@ async def get_portfolio_profile(supabase, portfolio_id: str, user_id: Optional[s
         PermissionError: If user_id provided and doesn't own the portfolio
     """
     try:
-        resp = supabase.table('portfolios') \
-            .select('id, investor_profile, target_equity_pct, investment_horizon_years, objective, client_id') \
-            .eq('id', portfolio_id) \
-            .execute()
+        # The owning user comes embedded with the portfolio (one round-trip)
+        resp = await sb_execute(
+            supabase.table('portfolios')
+            .select('id, investor_profile, target_equity_pct, investment_horizon_years, objective, client_id, clients(user_id)')
+            .eq('id', portfolio_id)
+        )
 
         if not resp.data:
             return None
@@ -83,15 +94,12 @@ async def get_portfolio_profile(supabase, portfolio_id: str, user_id: Optional[s
         portfolio = resp.data[0]
         
         # Ownership check if user_id provided
-        settings = get_settings()
         if user_id and not settings.SKIP_OWNERSHIP_CHECK:
-            client_resp = supabase.table('clients').select('user_id').eq('id', portfolio['client_id']).execute()
-            if client_resp.data:
-                client_user_id = client_resp.data[0].get('user_id')
-                logger.info(f"🔐 Profile ownership check: token user_id={user_id}, client user_id={client_user_id}")
-                if client_user_id and client_user_id != user_id:
-                    logger.warning(f"❌ Forbidden: user {user_id} tried to access profile of portfolio owned by {client_user_id}")
-                    raise PermissionError(f"User {user_id} does not own portfolio {portfolio_id}")
+            client_user_id = (portfolio.get('clients') or {}).get('user_id')
+            logger.info(f"🔐 Profile ownership check: token user_id={user_id}, client user_id={client_user_id}")
+            if client_user_id and client_user_id != user_id:
+                logger.warning(f"❌ Forbidden: user {user_id} tried to access profile of portfolio owned by {client_user_id}")
+                raise PermissionError(f"User {user_id} does not own portfolio {portfolio_id}")
         elif settings.SKIP_OWNERSHIP_CHECK:
             logger.warning(f"⚠️  SKIP_OWNERSHIP_CHECK=True - Allowing profile access without ownership validation (DEV ONLY!)")
         
@@ -129,12 +137,8 @@ async def update_portfolio_profile(
         
     Raises:
         PermissionError: If user doesn't own the portfolio
+        ValueError: If the portfolio does not exist
     """
-    # Check ownership first
-    existing = await get_portfolio_profile(supabase, portfolio_id, user_id)
-    if not existing:
-        raise ValueError(f"Portfolio {portfolio_id} not found")
-    
     update_payload = {}
     
     # Update profile if provided
@@ -156,22 +160,28 @@ async def update_portfolio_profile(
     if objective is not None:
         update_payload['objective'] = objective
     
-    if not update_payload:
-        # No changes, return existing
-        return existing
+    if not update_payload or (user_id and not settings.SKIP_OWNERSHIP_CHECK):
+        # The ownership check needs the owning user before writing; with
+        # nothing to write the read alone is the answer
+        existing = await get_portfolio_profile(supabase, portfolio_id, user_id)
+        if not existing:
+            raise ValueError(f"Portfolio {portfolio_id} not found")
+        if not update_payload:
+            # No changes, return existing
+            return existing
     
     try:
-        resp = supabase.table('portfolios') \
-            .update(update_payload) \
-            .eq('id', portfolio_id) \
-            .select('*') \
-            .execute()
-            
-        if not resp.data:
-            raise Exception('Portfolio not found or update failed')
-            
-        return resp.data[0]
-        
+        # The UPDATE returns the updated row (return=representation): no re-read
+        resp = await sb_execute(
+            supabase.table('portfolios')
+            .update(update_payload)
+            .eq('id', portfolio_id)
+        )
     except Exception as e:
         logger.error(f"Error updating portfolio profile: {e}")
         raise
+    
+    if not resp.data:
+        raise ValueError(f"Portfolio {portfolio_id} not found")
+    
+    return resp.data[0]
@@ -15,7 +15,10 @@ assigning to this module-level name. If not provided, the function will
 import the real client at runtime.
 """
 
-from typing import List
+from bisect import bisect_left, bisect_right
+from collections import defaultdict
+from typing import Dict, List
+import asyncio
 import logging
 from math import isclose
 
@@ -25,15 +28,62 @@ get_supabase = None
 
 from schemas.score import PortfolioScoreResult, SubScore, Alert
 from services.profile import get_portfolio_profile
+from utils.db import sb_execute
+import lazy_imports
 
 logger = logging.getLogger(__name__)
 
+# positions_enriched columns used by the sub-scores
+_SCORING_COLUMNS = 'asset_class,region,currency,current_value,sector,perf_1y,volatility_1y'
+
+# Asset class (lowercase) -> category code used by the sub-scores
+_EQUITY, _BOND = 1, 2
+_ASSET_CLASS_CODES = {
+    'action': _EQUITY,
+    'etf': _EQUITY,
+    'obligation': _BOND,
+    'bond': _BOND,
+    'fond_euro': _BOND,
+}
+
+
+# Piecewise-linear score ladders: breakpoints, and per segment
+# (score at segment start, segment start, slope)
+_HHI_BREAKS = (0.10, 0.15, 0.25, 0.30)
+_HHI_SEGMENTS = (
+    (100.0, 0.0, 0.0),     # HHI < 0.10: 100
+    (100.0, 0.10, 400.0),  # 100 to 80
+    (80.0, 0.15, 300.0),   # 80 to 50
+    (50.0, 0.25, 1000.0),  # 50 to 0
+    (50.0, 0.30, 500.0),   # 50 to 0 (clamped)
+)
+_DELTA_BREAKS = (5.0, 10.0, 15.0, 20.0)
+_DELTA_SEGMENTS = (
+    (100.0, 0.0, 0.0),  # delta <= 5: 100
+    (100.0, 5.0, 4.0),  # 100 to 80
+    (80.0, 10.0, 4.0),  # 80 to 60
+    (60.0, 15.0, 4.0),  # 60 to 40
+    (40.0, 20.0, 2.0),  # 40 to 0 (clamped)
+)
+
 
 def clamp_0_100(v: float) -> float:
     """Clamp a value to the range [0, 100]."""
     return max(0.0, min(100.0, float(v)))
 
 
+def _ladder_score(x: float, breaks: tuple, segments: tuple, side=bisect_right) -> float:
+    """
+    Evaluate a piecewise-linear ladder at x (not clamped).
+    
+    The segment is found by bisecting the breakpoints: bisect_right makes
+    each breakpoint start the next segment (`x < b` ladders), bisect_left
+    keeps it in the previous one (`x <= b` ladders).
+    """
+    start_score, start, slope = segments[side(breaks, x)]
+    return start_score - (x - start) * slope
+
+
 def _safe_float(val, default: float) -> float:
     """Safe float conversion used for values coming from DB/payloads."""
     try:
@@ -90,35 +140,118 @@ async def compute_portfolio_score(portfolio_id: str, user_id: str) -> PortfolioS
         ValueError: If portfolio not found
         PermissionError: If user doesn't own portfolio (checked in get_portfolio_profile)
     """
-    # Resolve supabase client. Prefer an injected callable (useful for tests).
-    if callable(get_supabase):
-        supabase = get_supabase()
-    else:
-        # Lazy import to avoid pulling heavy dependencies during test collection
-        from utils.supabase_client import get_supabase as _get_supabase
-        supabase = _get_supabase()
-
-    # Fetch portfolio profile info (investor_profile, target_equity_pct)
-    portfolio = await get_portfolio_profile(supabase, portfolio_id, user_id)
+    supabase = _resolve_supabase()
+
+    # Portfolio profile info (investor_profile, target_equity_pct) and positions
+    # from the view are independent requests: run them concurrently
+    portfolio, resp = await asyncio.gather(
+        get_portfolio_profile(supabase, portfolio_id, user_id),
+        sb_execute(
+            supabase.table('positions_enriched').select(_SCORING_COLUMNS).eq('portfolio_id', portfolio_id)
+        ),
+    )
     if not portfolio:
         raise ValueError(f"Portfolio {portfolio_id} not found")
+    
+    return _score_positions(portfolio, resp.data or [])
+
+
+async def compute_portfolio_scores(portfolio_ids: List[str], user_id: str) -> Dict[str, PortfolioScoreResult]:
+    """Compute the scores of several portfolios with a single positions query.
+    
+    Same scoring as compute_portfolio_score, but the positions of every
+    portfolio are loaded in one `portfolio_id IN (...)` request and grouped
+    in memory, instead of one round-trip per portfolio.
+
+    Args:
+        portfolio_ids: UUIDs of the portfolios
+        user_id: Requesting user id for ownership checks
+
+    Returns:
+        Dictionary portfolio_id -> PortfolioScoreResult
+        
+    Raises:
+        ValueError: If a portfolio is not found
+        PermissionError: If user doesn't own one of the portfolios
+    """
+    portfolio_ids = list(dict.fromkeys(portfolio_ids))
+    if not portfolio_ids:
+        return {}
+
+    supabase = _resolve_supabase()
+
+    # Profile fields (with ownership checks) and positions, concurrently
+    *portfolios, resp = await asyncio.gather(
+        *(get_portfolio_profile(supabase, portfolio_id, user_id) for portfolio_id in portfolio_ids),
+        sb_execute(
+            supabase.table('positions_enriched')
+            .select('portfolio_id,' + _SCORING_COLUMNS)
+            .in_('portfolio_id', portfolio_ids)
+        ),
+    )
+    for portfolio_id, portfolio in zip(portfolio_ids, portfolios):
+        if not portfolio:
+            raise ValueError(f"Portfolio {portfolio_id} not found")
+    
+    positions_by_portfolio = defaultdict(list)
+    for row in resp.data or []:
+        positions_by_portfolio[row['portfolio_id']].append(row)
+
+    return {
+        portfolio_id: _score_positions(portfolio, positions_by_portfolio[portfolio_id])
+        for portfolio_id, portfolio in zip(portfolio_ids, portfolios)
+    }
+
+
+def _resolve_supabase():
+    """Resolve the supabase client. Prefer an injected callable (useful for tests)."""
+    if callable(get_supabase):
+        return get_supabase()
+    # Lazy import to avoid pulling heavy dependencies during test collection
+    from utils.supabase_client import get_supabase as _get_supabase
+    return _get_supabase()
+
 
+def _score_positions(portfolio: dict, positions: List[dict]) -> PortfolioScoreResult:
+    """Apply the scoring rules to a portfolio's profile fields and position rows."""
     # Use a safe fallback when the DB field exists but is NULL (portfolio.get(..., default)
     # will return None if the key exists with a None value). The `or` fallback guarantees
     # a string is provided to downstream logic.
     investor_profile = (portfolio.get('investor_profile') or 'equilibre')
     target_equity_pct = _safe_float(portfolio.get('target_equity_pct'), 60.0)
-
-    # Load positions from view
-    resp = supabase.table('positions_enriched').select('*').eq('portfolio_id', portfolio_id).execute()
-    positions = resp.data or []
-
-    total_value = 0.0
+    
+    # ============================================================
+    # COLUMN ARRAYS (one pass over the rows, one NumPy array per field)
+    # ============================================================
+    np = lazy_imports.numpy
+    nan = float('nan')
+    
+    # String fields are classified once per row (category code / flags), so
+    # the aggregations below only compare integers and booleans
+    values, perfs, vols = [], [], []
+    class_codes, usd_flags, tech_flags = [], [], []
+    sectors = set()
     for p in positions:
-        try:
-            total_value += float(p.get('current_value') or 0)
-        except Exception:
-            continue
+        get = p.get
+        sector_raw = get('sector') or ''
+        region_lower = (get('region') or '').lower()
+        # Unparseable values count as 0 (value) or missing (perf/vol)
+        values.append(_safe_float(get('current_value'), 0.0))
+        perfs.append(_safe_float(get('perf_1y'), nan))
+        vols.append(_safe_float(get('volatility_1y'), nan))
+        class_codes.append(_ASSET_CLASS_CODES.get((get('asset_class') or '').lower(), 0))
+        usd_flags.append(
+            (get('currency') or '').upper() == 'USD' or 'usa' in region_lower or 'etats-unis' in region_lower
+        )
+        # 'tech' also covers 'technology'
+        tech_flags.append('tech' in sector_raw.lower())
+        # Unique sectors (non-blank, as written)
+        sector_stripped = sector_raw.strip()
+        if sector_stripped:
+            sectors.add(sector_stripped)
+    
+    cv = np.array(values, dtype=np.float64)
+    total_value = float(cv.sum())
 
     # Handle empty portfolio
     if isclose(total_value, 0.0) or len(positions) == 0:
@@ -141,30 +274,25 @@ async def compute_portfolio_score(portfolio_id: str, user_id: str) -> PortfolioS
             concentration_top5=0.0
         )
 
+    perf = np.array(perfs, dtype=np.float64)
+    vol = np.array(vols, dtype=np.float64)
+    class_code = np.array(class_codes, dtype=np.int8)
+    usd_mask = np.array(usd_flags, dtype=bool)
+    tech_mask = np.array(tech_flags, dtype=bool)
+    
     # ============================================================
     # CALCULATE WEIGHTS AND AGGREGATIONS
     # ============================================================
-    weights = []
-    for p in positions:
-        try:
-            w = float(p.get('current_value') or 0) / total_value
-        except Exception:
-            w = 0.0
-        weights.append((p, w))
-    
-    # Sort by weight descending to get top positions
-    weights_sorted = sorted(weights, key=lambda x: x[1], reverse=True)
+    weights = cv / total_value
     
-    # Calculate concentration_top5
-    top5_weights = [w for _, w in weights_sorted[:5]]
-    concentration_top5 = sum(top5_weights) * 100.0  # as percentage
+    # Calculate concentration_top5 (5 largest weights, as percentage).
+    # np.partition selects them in linear time, without a full sort
+    top5 = np.partition(weights, weights.size - 5)[-5:] if weights.size > 5 else weights
+    concentration_top5 = float(top5.sum()) * 100.0
     
     # Calculate Herfindahl Index (HHI): sum of squared weights
-    hhi = sum(w * w for _, w in weights)
+    hhi = float(weights @ weights)
     
-    # Count unique sectors
-    sectors = set((p.get('sector') or '').strip() for p, _ in weights if p.get('sector'))
-    sectors = set(s for s in sectors if s)
     num_sectors = len(sectors)
     
     # ============================================================
@@ -176,16 +304,7 @@ async def compute_portfolio_score(portfolio_id: str, user_id: str) -> PortfolioS
     # - HHI 0.15-0.25: moderate (score 50-80)
     # - HHI > 0.30: highly concentrated (score 0-50)
     
-    if hhi < 0.10:
-        diversification_score = 100.0
-    elif hhi < 0.15:
-        diversification_score = 100.0 - (hhi - 0.10) * 400  # 100 to 80
-    elif hhi < 0.25:
-        diversification_score = 80.0 - (hhi - 0.15) * 300   # 80 to 50
-    elif hhi < 0.30:
-        diversification_score = 50.0 - (hhi - 0.25) * 1000  # 50 to 0
-    else:
-        diversification_score = max(0.0, 50.0 - (hhi - 0.30) * 500)
+    diversification_score = _ladder_score(hhi, _HHI_BREAKS, _HHI_SEGMENTS)
     
     # Penalize if too few sectors
     if num_sectors < 3:
@@ -200,27 +319,13 @@ async def compute_portfolio_score(portfolio_id: str, user_id: str) -> PortfolioS
     # SUB-SCORE 2: RISK PROFILE ALIGNMENT (0-100)
     # ============================================================
     # Compare actual equity allocation vs target from investor profile
-    equity_classes = {'action', 'etf'}
-    equity_value = 0.0
-    for p, _ in weights:
-        asset_class_lower = (p.get('asset_class') or '').lower()
-        if asset_class_lower in equity_classes:
-            equity_value += float(p.get('current_value') or 0)
-
+    equity_value = float(cv[class_code == _EQUITY].sum())
+    
     actual_equity_pct = (equity_value / total_value) * 100.0
     delta = abs(actual_equity_pct - target_equity_pct)
 
     # Score based on deviation from target
-    if delta <= 5.0:
-        risk_score = 100.0
-    elif delta <= 10.0:
-        risk_score = 100.0 - (delta - 5.0) * 4  # 100 to 80
-    elif delta <= 15.0:
-        risk_score = 80.0 - (delta - 10.0) * 4  # 80 to 60
-    elif delta <= 20.0:
-        risk_score = 60.0 - (delta - 15.0) * 4  # 60 to 40
-    else:
-        risk_score = max(0.0, 40.0 - (delta - 20.0) * 2)  # 40 to 0
+    risk_score = _ladder_score(delta, _DELTA_BREAKS, _DELTA_SEGMENTS, side=bisect_left)
     
     risk_score = clamp_0_100(risk_score)
     risk_desc = f"Cible {target_equity_pct:.1f}% vs réel {actual_equity_pct:.1f}% (écart: {delta:.1f}%)"
@@ -229,22 +334,9 @@ async def compute_portfolio_score(portfolio_id: str, user_id: str) -> PortfolioS
     # SUB-SCORE 3: MACRO EXPOSURE (0-100)
     # ============================================================
     # Analyze USD, Tech sector, and Bond exposure
-    usd_value = 0.0
-    tech_value = 0.0
-    bond_value = 0.0
-    
-    for p, _ in weights:
-        cv = float(p.get('current_value') or 0)
-        currency = (p.get('currency') or '').upper()
-        region = (p.get('region') or '').lower()
-        sector = (p.get('sector') or '').lower()
-
-        if currency == 'USD' or 'usa' in region or 'etats-unis' in region:
-            usd_value += cv
-        if 'technology' in sector or 'tech' in sector:
-            tech_value += cv
-        if (p.get('asset_class') or '').lower() in {'obligation', 'bond', 'fond_euro'}:
-            bond_value += cv
+    usd_value = float(cv[usd_mask].sum())
+    tech_value = float(cv[tech_mask].sum())
+    bond_value = float(cv[class_code == _BOND].sum())
 
     usd_pct = (usd_value / total_value) * 100.0
     tech_pct = (tech_value / total_value) * 100.0
@@ -276,25 +368,13 @@ async def compute_portfolio_score(portfolio_id: str, user_id: str) -> PortfolioS
     # SUB-SCORE 4: ASSET QUALITY (0-100)
     # ============================================================
     # Weighted average of 1Y performance and volatility
-    perf_sum = 0.0
-    vol_sum = 0.0
-    weight_perf_total = 0.0
-    weight_vol_total = 0.0
-    
-    for p, _ in weights:
-        try:
-            perf = p.get('perf_1y')
-            vol = p.get('volatility_1y')
-            cv = float(p.get('current_value') or 0)
-            
-            if perf is not None:
-                perf_sum += float(perf) * cv
-                weight_perf_total += cv
-            if vol is not None:
-                vol_sum += float(vol) * cv
-                weight_vol_total += cv
-        except Exception:
-            continue
+    # Missing values (NaN) are left out of both the sum and its weight
+    has_perf = ~np.isnan(perf)
+    has_vol = ~np.isnan(vol)
+    perf_sum = float(perf[has_perf] @ cv[has_perf])
+    vol_sum = float(vol[has_vol] @ cv[has_vol])
+    weight_perf_total = float(cv[has_perf].sum())
+    weight_vol_total = float(cv[has_vol].sum())
 
     if weight_perf_total > 0:
         avg_perf = (perf_sum / weight_perf_total)
@@ -0,0 +1,36 @@
+"""
+Shared pytest fixtures for the backend tests.
+
+The FastAPI app is imported inside the fixtures, so unit tests that never
+use them do not pay for it at collection time.
+"""
+
+import os
+import sys
+
+import pytest
+
+# make backend package importable
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+
+@pytest.fixture(scope='session')
+def client():
+    """One TestClient for the whole session."""
+    from fastapi.testclient import TestClient
+    from main import app
+
+    return TestClient(app)
+
+
+@pytest.fixture
+def override_supabase():
+    """Serve a fake Supabase client to the routers for the duration of a test."""
+    from main import app
+    import routers.portfolios as portfolios_router
+
+    def _override(fake_supabase):
+        app.dependency_overrides[portfolios_router.get_supabase_dependency] = lambda: fake_supabase
+
+    yield _override
+    app.dependency_overrides.pop(portfolios_router.get_supabase_dependency, None)
@@ -0,0 +1,62 @@
+import os
+import sys
+
+# make backend package importable
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+import utils.cache as cache_module
+from utils.cache import TTLCache
+
+
+def test_get_returns_value_until_expired(monkeypatch):
+    now = [100.0]
+    monkeypatch.setattr(cache_module.time, 'monotonic', lambda: now[0])
+
+    cache = TTLCache(maxsize=10, ttl=30.0)
+    cache.set('k', 'v')
+    assert cache.get('k') == 'v'
+
+    now[0] += 31.0
+    assert cache.get('k') is None
+    assert len(cache) == 0
+
+
+def test_least_recently_used_entry_is_evicted():
+    cache = TTLCache(maxsize=2, ttl=30.0)
+    cache.set('a', 1)
+    cache.set('b', 2)
+    cache.get('a')  # 'a' becomes most recently used
+    cache.set('c', 3)
+
+    assert cache.get('b') is None
+    assert cache.get('a') == 1
+    assert cache.get('c') == 3
+
+
+def test_pop_removes_entry():
+    cache = TTLCache()
+    cache.set('k', 'v')
+    assert cache.pop('k') == 'v'
+    assert cache.pop('k') is None
+    assert cache.get('k') is None
+
+
+def test_portfolio_versions_invalidate_then_expire(monkeypatch):
+    import routers.portfolios as portfolios_router
+
+    now = [100.0]
+    monkeypatch.setattr(cache_module.time, 'monotonic', lambda: now[0])
+    monkeypatch.setattr(portfolios_router, '_PORTFOLIO_VERSIONS', TTLCache(maxsize=10, ttl=60.0))
+    monkeypatch.setattr(portfolios_router, '_SCORE_CACHE', TTLCache(maxsize=10, ttl=30.0))
+
+    stale_key = portfolios_router._cache_key('p1', 'user-1')
+    portfolios_router._SCORE_CACHE.set(stale_key, b'stale')
+    portfolios_router._invalidate_portfolio('p1')
+    assert portfolios_router._SCORE_CACHE.get(portfolios_router._cache_key('p1', 'user-1')) is None
+
+    # Once the version expires, every entry cached under the old one is gone too
+    now[0] += 61.0
+    assert len(portfolios_router._PORTFOLIO_VERSIONS) == 1
+    assert portfolios_router._cache_key('p1', 'user-1') == stale_key
+    assert portfolios_router._SCORE_CACHE.get(stale_key) is None
+    assert len(portfolios_router._PORTFOLIO_VERSIONS) == 0
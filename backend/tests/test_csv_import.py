@@ -0,0 +1,226 @@
+from types import SimpleNamespace
+
+import pytest
+from postgrest.exceptions import APIError
+
+import routers.portfolios as portfolios_router
+
+
+PORTFOLIO_FK_ERROR = {
+    'code': '23503',
+    'message': 'insert or update on table "positions" violates foreign key constraint "positions_portfolio_id_fkey"',
+    'details': 'Key (portfolio_id)=(missing) is not present in table "portfolios".',
+}
+ASSET_FK_ERROR = {
+    'code': '23503',
+    'message': 'insert or update on table "positions" violates foreign key constraint "positions_asset_id_fkey"',
+    'details': 'Key (asset_id)=(stale-id) is not present in table "assets".',
+}
+
+CSV_HEADER = 'date,provider,asset_class,instrument_name,isin,region,currency,current_value\n'
+CSV_HEADER_WITH_QUANTITY = CSV_HEADER.replace('current_value', 'current_value,quantity')
+
+
+class FakeQuery:
+    def __init__(self, supabase, name, op=None, payload=None):
+        self._supabase = supabase
+        self._name = name
+        self._op = op
+        self._payload = payload
+
+    def select(self, *args, **kwargs):
+        return FakeQuery(self._supabase, self._name, 'select')
+
+    def insert(self, payload, **kwargs):
+        return FakeQuery(self._supabase, self._name, 'insert', payload)
+
+    def eq(self, *args, **kwargs):
+        return self
+
+    def in_(self, *args, **kwargs):
+        return self
+
+    def single(self):
+        return self
+
+    def execute(self):
+        return self._supabase.handle(self._name, self._op, self._payload)
+
+
+class FakeSupabase:
+    def __init__(self, assets=None, position_errors=None):
+        # ISIN -> asset id stored in the assets table
+        self.assets = dict(assets or {})
+        # Errors raised by the successive positions inserts (None = success)
+        self.position_errors = list(position_errors or [])
+        self.inserted_positions = []
+
+    def table(self, name):
+        return FakeQuery(self, name)
+
+    def handle(self, name, op, payload):
+        if name == 'assets' and op == 'select':
+            return SimpleNamespace(data=[{'id': asset_id, 'isin': isin} for isin, asset_id in self.assets.items()])
+        if name == 'assets' and op == 'insert':
+            rows = [{'id': f"new-{row['isin']}", 'isin': row['isin']} for row in payload]
+            return SimpleNamespace(data=rows)
+        if name == 'positions' and op == 'insert':
+            error = self.position_errors.pop(0) if self.position_errors else None
+            if error:
+                raise APIError(error)
+            self.inserted_positions.append(payload)
+            return SimpleNamespace(data=[])
+        if name == 'portfolios':
+            return SimpleNamespace(data={'client_id': 'client-1', 'clients': {'user_id': 'user-1'}})
+        return SimpleNamespace(data=[])
+
+
+class FakeEnrichment:
+    async def enrich_portfolio_assets(self, portfolio_id):
+        return {'success': 0, 'failed': 0, 'total': 0}
+
+
+@pytest.fixture
+def import_csv(client, override_supabase):
+    from main import app
+
+    app.dependency_overrides[portfolios_router.get_enrichment_service] = FakeEnrichment
+    portfolios_router._ISIN_ID_CACHE.clear()
+
+    def _import(fake_supabase, rows, portfolio_id='p1', header=CSV_HEADER):
+        override_supabase(fake_supabase)
+        csv = header + ''.join(row + '\n' for row in rows)
+        return client.post(
+            f"/api/portfolios/{portfolio_id}/import",
+            files={'file': ('positions.csv', csv.encode(), 'text/csv')},
+        )
+
+    yield _import
+    app.dependency_overrides.pop(portfolios_router.get_enrichment_service, None)
+    portfolios_router._ISIN_ID_CACHE.clear()
+
+
+ROW = '2024-11-19,Boursorama,action,TotalEnergies,FR0000120271,europe,EUR,1000.00'
+
+
+def test_import_unknown_portfolio_returns_404(import_csv):
+    fake_supabase = FakeSupabase(assets={'FR0000120271': 'asset-1'}, position_errors=[PORTFOLIO_FK_ERROR])
+
+    resp = import_csv(fake_supabase, [ROW], portfolio_id='missing')
+
+    assert resp.status_code == 404
+
+
+def test_import_retries_stale_cached_asset_id(import_csv):
+    portfolios_router._ISIN_ID_CACHE.set('FR0000120271', 'stale-id')
+    fake_supabase = FakeSupabase(assets={'FR0000120271': 'asset-1'}, position_errors=[ASSET_FK_ERROR])
+
+    resp = import_csv(fake_supabase, [ROW])
+
+    assert resp.status_code == 200
+    assert resp.json()['rows_imported'] == 1
+    assert fake_supabase.inserted_positions[0][0]['asset_id'] == 'asset-1'
+    assert portfolios_router._ISIN_ID_CACHE.get('FR0000120271') == 'asset-1'
+
+
+def test_import_missing_asset_after_retry_returns_409(import_csv):
+    fake_supabase = FakeSupabase(assets={'FR0000120271': 'asset-1'}, position_errors=[ASSET_FK_ERROR, ASSET_FK_ERROR])
+
+    resp = import_csv(fake_supabase, [ROW])
+
+    assert resp.status_code == 409
+    assert portfolios_router._ISIN_ID_CACHE.get('FR0000120271') is None
+
+
+def test_import_accepts_lowercase_isin(import_csv):
+    fake_supabase = FakeSupabase(assets={'FR0000120271': 'asset-1'})
+
+    resp = import_csv(fake_supabase, [ROW.replace('FR0000120271', ' fr0000120271')])
+
+    assert resp.status_code == 200
+    assert resp.json()['rows_failed'] == 0
+    position = fake_supabase.inserted_positions[0][0]
+    assert position['isin'] == 'FR0000120271'
+    assert position['asset_id'] == 'asset-1'
+
+
+def test_import_keeps_valid_rows_and_reports_bad_ones(import_csv):
+    fake_supabase = FakeSupabase(assets={'FR0000120271': 'asset-1'})
+    rows = [
+        ROW,
+        ROW.replace('2024-11-19', '19/11/2024'),
+        ROW,
+        ROW.replace('1000.00', 'abc'),
+        ROW.replace('FR0000120271', 'FR000012027'),
+    ]
+
+    resp = import_csv(fake_supabase, rows)
+
+    assert resp.status_code == 200
+    body = resp.json()
+    assert body['rows_imported'] == 2
+    assert body['rows_failed'] == 3
+    # Header is row 1, so the n-th data row is row n + 1
+    assert [(err['row'], err['field']) for err in body['errors']] == [
+        (3, 'date'),
+        (5, 'current_value'),
+        (6, 'isin'),
+    ]
+    assert len(fake_supabase.inserted_positions[0]) == 2
+
+
+def test_import_parses_comma_decimals_and_rejects_bad_quantity(import_csv):
+    fake_supabase = FakeSupabase(assets={'FR0000120271': 'asset-1'})
+    rows = [
+        ROW.replace('1000.00', '"1000,50","12,5"'),
+        ROW + ',',
+        ROW + ',ten',
+    ]
+
+    resp = import_csv(fake_supabase, rows, header=CSV_HEADER_WITH_QUANTITY)
+
+    assert resp.status_code == 200
+    body = resp.json()
+    assert [(err['row'], err['field']) for err in body['errors']] == [(4, 'quantity')]
+    first, second = fake_supabase.inserted_positions[0]
+    assert (first['current_value'], first['quantity']) == (1000.5, 12.5)
+    # An empty optional numeric is stored as NULL
+    assert second['quantity'] is None
+
+
+def test_import_treats_empty_and_placeholder_isin_as_missing(import_csv):
+    fake_supabase = FakeSupabase()
+    rows = [ROW.replace('FR0000120271', ''), ROW.replace('FR0000120271', 'N/A')]
+
+    resp = import_csv(fake_supabase, rows)
+
+    assert resp.status_code == 200
+    assert resp.json()['rows_failed'] == 0
+    for position in fake_supabase.inserted_positions[0]:
+        assert position['isin'] is None
+        assert 'asset_id' not in position
+
+
+@pytest.mark.parametrize('bad_position', [0, 1])
+def test_import_reports_row_with_extra_fields(import_csv, bad_position):
+    fake_supabase = FakeSupabase(assets={'FR0000120271': 'asset-1'})
+    rows = [ROW, ROW]
+    rows[bad_position] += ',unexpected'
+
+    resp = import_csv(fake_supabase, rows)
+
+    assert resp.status_code == 200
+    body = resp.json()
+    assert body['rows_imported'] == 1
+    assert body['errors'] == [
+        {'row': bad_position + 2, 'field': None, 'error': 'Too many fields: expected 8, got 9'}
+    ]
+
+
+def test_import_without_valid_rows_returns_400(import_csv):
+    fake_supabase = FakeSupabase()
+
+    resp = import_csv(fake_supabase, [ROW.replace('2024-11-19', 'yesterday')])
+
+    assert resp.status_code == 400
+    assert fake_supabase.inserted_positions == []
@@ -0,0 +1,158 @@
+import asyncio
+from types import SimpleNamespace
+
+import pytest
+from postgrest.exceptions import APIError
+
+import services.enrichment as enrichment
+
+
+class FakeQuery:
+    def __init__(self, supabase, name):
+        self._supabase = supabase
+        self._name = name
+        self.not_ = self
+
+    def select(self, *args, **kwargs):
+        return self
+
+    def upsert(self, rows, **kwargs):
+        self._supabase.upserts.append(rows)
+        return self
+
+    def eq(self, *args, **kwargs):
+        return self
+
+    def is_(self, *args, **kwargs):
+        return self
+
+    def execute(self):
+        if self._supabase.select_error and self._name == 'positions':
+            raise APIError(self._supabase.select_error)
+        return SimpleNamespace(data=self._supabase.positions if self._name == 'positions' else [])
+
+
+class FakeSupabase:
+    def __init__(self, positions, select_error=None):
+        self.positions = positions
+        self.select_error = select_error
+        self.upserts = []
+
+    def table(self, name):
+        return FakeQuery(self, name)
+
+
+@pytest.fixture
+def make_service(monkeypatch):
+    monkeypatch.setattr(enrichment.settings, 'MARKET_DATA_CACHE_PATH', '')
+
+    def _make(fake_supabase, market_data):
+        monkeypatch.setattr(enrichment, 'get_supabase', lambda: fake_supabase)
+        service = enrichment.MarketDataService()
+
+        async def fake_batch(isins, info_isins=None):
+            return market_data
+
+        monkeypatch.setattr(service, 'fetch_market_data_batch', fake_batch)
+        return service
+
+    return _make
+
+
+def test_unchanged_series_only_moves_last_updated(make_service):
+    positions = [{'asset_id': 'a1', 'assets': {'isin': 'FR0013380607', 'name': 'Amundi', 'sector': 'Financials', 'series_hash': 'h1'}}]
+    market_data = {'FR0013380607': {'isin': 'FR0013380607', 'ticker': 'C40.PA', 'last_price': 83.45, 'last_updated': '2024-11-23T10:00:00+00:00', 'series_hash': 'h1'}}
+    fake_supabase = FakeSupabase(positions)
+
+    result = asyncio.run(make_service(fake_supabase, market_data).enrich_portfolio_assets('p1'))
+
+    assert result == {'success': 1, 'failed': 0, 'total': 1}
+    assert fake_supabase.upserts == [[
+        {'id': 'a1', 'isin': 'FR0013380607', 'name': 'Amundi', 'last_updated': '2024-11-23T10:00:00+00:00'}
+    ]]
+
+
+def test_missing_series_hash_column_raises(make_service):
+    error = {'code': '42703', 'message': 'column assets_1.series_hash does not exist'}
+    service = make_service(FakeSupabase([], select_error=error), {})
+
+    with pytest.raises(RuntimeError, match='supabase-migration-performance.sql'):
+        asyncio.run(service.enrich_portfolio_assets('p1'))
+
+
+@pytest.fixture
+def batch_service(monkeypatch):
+    """Service with an in-memory cache and stubbed Yahoo requests."""
+    monkeypatch.setattr(enrichment.settings, 'MARKET_DATA_CACHE_PATH', '')
+    monkeypatch.setattr(enrichment, 'get_supabase', lambda: FakeSupabase([]))
+    service = enrichment.MarketDataService()
+    service.cache = enrichment.MarketDataCache(':memory:')
+    service.chart_clients = []
+    service.requests = {'info': [], 'shares': []}
+
+    async def fake_closes(client, symbols, concurrency, period='1y', rate_limiter=None):
+        return {symbol: [100.0, 110.0] for symbol in symbols}
+
+    def fake_info(ticker_symbol):
+        service.requests['info'].append(ticker_symbol)
+        quote_type = 'ETF' if ticker_symbol == 'C40.PA' else 'EQUITY'
+        return {'symbol': ticker_symbol, 'longName': f'Name {ticker_symbol}', 'quoteType': quote_type, 'currency': 'EUR'}
+
+    def fake_shares(ticker_symbol):
+        service.requests['shares'].append(ticker_symbol)
+        return 1000
+
+    def fake_chart_client(concurrency):
+        service.chart_clients.append(object())
+        return service.chart_clients[-1]
+    
+    monkeypatch.setattr(enrichment, 'create_chart_client', fake_chart_client)
+    monkeypatch.setattr(enrichment, 'fetch_daily_closes_many', fake_closes)
+    monkeypatch.setattr(service, '_fetch_info', fake_info)
+    monkeypatch.setattr(service, '_fetch_shares', fake_shares)
+    yield service
+    service.cache.close()
+
+
+def test_batch_refetches_info_only_for_stale_profiles(batch_service):
+    isins = ['FR0013380607', 'FR0000120271']
+    # ETF (C40.PA) already described, equity never described
+    batch_service.cache.set(enrichment.PROFILE_TABLE, 'C40.PA', {'name': 'Amundi', 'asset_type': 'etf'})
+
+    result = asyncio.run(batch_service.fetch_market_data_batch(isins, info_isins={'FR0000120271'}))
+
+    assert batch_service.requests['info'] == ['FR0000120271.PA']
+    # Fresh cached profile of a described asset: price fields only
+    assert 'asset_type' not in result['FR0013380607']
+    assert result['FR0000120271']['asset_type'] == 'stock'
+
+    # Profiles past MARKET_PROFILE_CACHE_DAYS are refetched and returned
+    batch_service.profile_max_age = 0
+    batch_service.snapshot_max_age = 0
+    result = asyncio.run(batch_service.fetch_market_data_batch(isins, info_isins=set()))
+
+    assert batch_service.requests['info'] == ['FR0000120271.PA', 'C40.PA', 'FR0000120271.PA']
+    assert result['FR0013380607']['name'] == 'Name C40.PA'
+
+
+def test_batch_market_cap_comes_from_share_count(batch_service):
+    result = asyncio.run(batch_service.fetch_market_data_batch(['FR0013380607', 'FR0000120271']))
+
+    # No share count request for the ETF
+    assert batch_service.requests['shares'] == ['FR0000120271.PA']
+    assert result['FR0000120271']['market_cap'] == 110000
+    assert result['FR0000120271']['previous_close'] == 100.0
+
+
+def test_chart_client_is_recreated_for_each_event_loop(batch_service):
+    async def batch():
+        await batch_service.fetch_market_data_batch(['FR0000120271'])
+        # Same loop: the pooled client is reused
+        batch_service.snapshot_max_age = 0
+        await batch_service.fetch_market_data_batch(['FR0000120271'])
+
+    asyncio.run(batch())
+    asyncio.run(batch())
+
+    assert len(batch_service.chart_clients) == 2
+    assert batch_service._chart_client is batch_service.chart_clients[-1]
@@ -0,0 +1,29 @@
+import os
+import sys
+
+import pytest
+from pydantic import ValidationError
+
+# make backend package importable
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from schemas.asset import AssetCreate, isin_has_valid_check_digit
+
+
+@pytest.mark.parametrize('isin', ['FR0000120271', 'IE00B4L5Y983', 'US0378331005', 'KYG875721634'])
+def test_valid_check_digits(isin):
+    assert isin_has_valid_check_digit(isin)
+
+
+@pytest.mark.parametrize('isin', ['FR0000120272', 'US0378331006'])
+def test_invalid_check_digits(isin):
+    assert not isin_has_valid_check_digit(isin)
+
+
+def test_asset_create_normalizes_and_checks_isin():
+    assert AssetCreate(isin='fr0000120271', name='TotalEnergies').isin == 'FR0000120271'
+
+    with pytest.raises(ValidationError):
+        AssetCreate(isin='FR0000120272', name='Typo')
+    with pytest.raises(ValidationError):
+        AssetCreate(isin='F10000120271', name='Bad format')
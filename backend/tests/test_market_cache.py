@@ -0,0 +1,32 @@
+import os
+import sys
+
+# make backend package importable
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+import utils.market_cache as market_cache_module
+from utils.market_cache import MarketDataCache, PROFILE_TABLE, SNAPSHOT_TABLE
+
+
+def test_round_trip_persists_across_connections(tmp_path):
+    path = str(tmp_path / 'cache' / 'marketdata.db')
+    cache = MarketDataCache(path)
+    cache.set(PROFILE_TABLE, 'MC.PA', {'name': 'LVMH', 'sector': 'Consumer Cyclical'})
+    cache.close()
+
+    reopened = MarketDataCache(path)
+    assert reopened.get(PROFILE_TABLE, 'MC.PA', max_age=3600) == {'name': 'LVMH', 'sector': 'Consumer Cyclical'}
+    assert reopened.get(SNAPSHOT_TABLE, 'MC.PA', max_age=3600) is None
+    reopened.close()
+
+
+def test_expired_entry_is_a_miss(monkeypatch):
+    now = [1000.0]
+    monkeypatch.setattr(market_cache_module.time, 'time', lambda: now[0])
+
+    cache = MarketDataCache(':memory:')
+    cache.set(SNAPSHOT_TABLE, 'MC.PA', {'last_price': 700.0})
+    now[0] += 60
+    assert cache.get(SNAPSHOT_TABLE, 'MC.PA', max_age=120) == {'last_price': 700.0}
+    now[0] += 120
+    assert cache.get(SNAPSHOT_TABLE, 'MC.PA', max_age=120) is None
@@ -0,0 +1,107 @@
+import pytest
+
+
+class FakeTable:
+    def __init__(self, name, data, calls):
+        self._name = name
+        self._data = data
+        self._calls = calls
+
+    def select(self, *args, **kwargs):
+        return self
+
+    def eq(self, *args, **kwargs):
+        return self
+
+    def limit(self, *args, **kwargs):
+        return self
+
+    def execute(self):
+        self._calls.append(self._name)
+        return type('R', (), {'data': self._data, 'count': len(self._data)})()
+
+
+class FakeSupabase:
+    def __init__(self, portfolios, positions):
+        self._tables = {'portfolios': portfolios, 'positions_enriched': positions}
+        self.calls = []
+
+    def table(self, name):
+        return FakeTable(name, self._tables.get(name, []), self.calls)
+
+
+POSITION_ROW = {
+    'id': 'pos-1',
+    'portfolio_id': 'p1',
+    'date': '2024-11-19',
+    'provider': 'Boursorama',
+    'asset_class': 'etf',
+    'instrument_name': 'Amundi CAC 40',
+    'isin': 'FR0013380607',
+    'region': 'europe',
+    'currency': 'EUR',
+    'quantity': None,
+    'purchase_price': None,
+    'current_value': 9230.0,
+    'notes': None,
+    'asset_id': 'asset-1',
+    'created_at': '2024-11-19T10:00:00+00:00',
+    'updated_at': '2024-11-19T10:00:00+00:00',
+    'ticker': 'C40.PA',
+    'asset_name': 'Amundi CAC 40',
+    'sector': 'Financial Services',
+    'asset_region': 'europe',
+    'last_price': 83.45,
+    'perf_1y': 15.2,
+    'market_data_updated_at': '2024-11-19T10:00:00+00:00',
+}
+
+
+@pytest.fixture
+def client_for(client, override_supabase):
+    def _make(fake_supabase):
+        override_supabase(fake_supabase)
+        return client
+    return _make
+
+
+def test_positions_skip_existence_check_when_rows_found(client_for):
+    fake_supabase = FakeSupabase(portfolios=[{'id': 'p1'}], positions=[POSITION_ROW])
+
+    resp = client_for(fake_supabase).get("/api/portfolios/p1/positions")
+
+    assert resp.status_code == 200
+    body = resp.json()
+    assert len(body) == 1
+    assert body[0]['asset']['name'] == 'Amundi CAC 40'
+    assert fake_supabase.calls == ['positions_enriched']
+
+
+def test_positions_empty_portfolio(client_for):
+    fake_supabase = FakeSupabase(portfolios=[{'id': 'p1'}], positions=[])
+
+    resp = client_for(fake_supabase).get("/api/portfolios/p1/positions")
+
+    assert resp.status_code == 200
+    assert resp.json() == []
+    assert fake_supabase.calls == ['positions_enriched', 'portfolios']
+
+
+def test_positions_unknown_portfolio(client_for):
+    fake_supabase = FakeSupabase(portfolios=[], positions=[])
+
+    resp = client_for(fake_supabase).get("/api/portfolios/missing/positions")
+
+    assert resp.status_code == 404
+
+
+def test_positions_not_modified_when_etag_matches(client_for):
+    client = client_for(FakeSupabase(portfolios=[{'id': 'p1'}], positions=[POSITION_ROW]))
+
+    first = client.get("/api/portfolios/p1/positions")
+    etag = first.headers['etag']
+    assert first.headers['cache-control'] == 'private, no-cache'
+
+    second = client.get("/api/portfolios/p1/positions", headers={'If-None-Match': etag})
+    assert second.status_code == 304
+    assert second.content == b''
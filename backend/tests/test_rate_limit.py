@@ -0,0 +1,57 @@
+import asyncio
+import os
+import sys
+
+# make backend package importable
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+import utils.rate_limit as rate_limit_module
+from utils.rate_limit import RateLimiter
+
+
+def test_calls_are_spaced_by_interval(monkeypatch):
+    now = [100.0]
+    sleeps = []
+    monkeypatch.setattr(rate_limit_module.time, 'monotonic', lambda: now[0])
+    monkeypatch.setattr(rate_limit_module.time, 'sleep', sleeps.append)
+
+    limiter = RateLimiter(interval=1.0)
+    limiter.acquire()
+    limiter.acquire()
+    limiter.acquire()
+
+    # First call is immediate, the next ones reserve the following slots
+    assert sleeps == [1.0, 2.0]
+
+
+def test_no_wait_once_interval_has_elapsed(monkeypatch):
+    now = [100.0]
+    sleeps = []
+    monkeypatch.setattr(rate_limit_module.time, 'monotonic', lambda: now[0])
+    monkeypatch.setattr(rate_limit_module.time, 'sleep', sleeps.append)
+
+    limiter = RateLimiter(interval=1.0)
+    limiter.acquire()
+    now[0] += 5.0
+    limiter.acquire()
+
+    assert sleeps == []
+
+
+def test_async_callers_share_the_slot_schedule(monkeypatch):
+    now = [100.0]
+    sleeps = []
+
+    async def fake_sleep(delay):
+        sleeps.append(delay)
+
+    monkeypatch.setattr(rate_limit_module.time, 'monotonic', lambda: now[0])
+    monkeypatch.setattr(rate_limit_module.time, 'sleep', sleeps.append)
+    monkeypatch.setattr(rate_limit_module.asyncio, 'sleep', fake_sleep)
+
+    limiter = RateLimiter(interval=1.0)
+    limiter.acquire()
+    asyncio.run(limiter.acquire_async())
+    limiter.acquire()
+
+    assert sleeps == [1.0, 2.0]
@@ -1,14 +1,4 @@
-from fastapi.testclient import TestClient
-import pytest
-import sys
-import os
-
-# make backend package importable
-sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
-
-from main import app
 import routers.portfolios as portfolios_router
-import services.scoring as scoring_service
 
 
 class FakeTable:
@@ -35,7 +25,8 @@ class FakeAuth:
 
 class FakeSupabase:
     def __init__(self, portfolio_id, client_id, client_user_id):
-        self._portfolio = {'id': portfolio_id, 'client_id': client_id}
+        # portfolios rows embed the owning client (select 'clients(user_id)')
+        self._portfolio = {'id': portfolio_id, 'client_id': client_id, 'clients': {'user_id': client_user_id}}
         self._client = {'id': client_id, 'user_id': client_user_id}
         self.auth = FakeAuth(client_user_id)
 
@@ -47,13 +38,7 @@ class FakeSupabase:
         return FakeTable([])
 
 
-@pytest.fixture(autouse=True)
-def override_dependency():
-    # default fixture - will be replaced inside tests
-    yield
-
-
-def test_score_endpoint_authorized(monkeypatch):
+def test_score_endpoint_authorized(monkeypatch, client, override_supabase):
     portfolio_id = 'test-portfolio-1'
     client_id = 'client-1'
     client_user_id = 'user-1'
@@ -61,7 +46,7 @@ def test_score_endpoint_authorized(monkeypatch):
     fake_supabase = FakeSupabase(portfolio_id, client_id, client_user_id)
 
     # override dependency in router
-    app.dependency_overrides[portfolios_router.get_supabase_dependency] = lambda: fake_supabase
+    override_supabase(fake_supabase)
 
     # stub compute_portfolio_score to return complete payload with all required fields
     async def fake_compute(pid, uid):
@@ -77,7 +62,6 @@ def test_score_endpoint_authorized(monkeypatch):
     # monkeypatch the real compute function used by the router (routers imported the function)
     monkeypatch.setattr(portfolios_router, 'compute_portfolio_score', fake_compute)
 
-    client = TestClient(app)
     resp = client.get(f"/api/portfolios/{portfolio_id}/score", headers={"Authorization": "Bearer token"})
     assert resp.status_code == 200
     body = resp.json()
@@ -85,21 +69,38 @@ def test_score_endpoint_authorized(monkeypatch):
     assert body['investor_profile'] == 'equilibre'
 
 
-def test_score_endpoint_forbidden(monkeypatch):
+def test_score_endpoint_forbidden(monkeypatch, client, override_supabase):
     portfolio_id = 'test-portfolio-2'
     client_id = 'client-2'
     # portfolio owner is user-A
     fake_supabase = FakeSupabase(portfolio_id, client_id, 'user-A')
     # but token belongs to user-B
     fake_supabase.auth = FakeAuth('user-B')
+    
+    override_supabase(fake_supabase)
+    
+    async def fake_compute(pid, uid):
+        # get_portfolio_profile refuses the token's user
+        assert uid == 'user-B'
+        raise PermissionError('Forbidden')
 
-    app.dependency_overrides[portfolios_router.get_supabase_dependency] = lambda: fake_supabase
+    monkeypatch.setattr(portfolios_router, 'compute_portfolio_score', fake_compute)
+
+    resp = client.get(f"/api/portfolios/{portfolio_id}/score", headers={"Authorization": "Bearer token"})
+    assert resp.status_code == 403
+
+
+def test_score_endpoint_not_found(monkeypatch, client, override_supabase):
+    portfolio_id = 'missing-portfolio'
+    fake_supabase = FakeSupabase(portfolio_id, 'client-3', 'user-A')
+    fake_supabase.auth = FakeAuth('user-A')
+
+    override_supabase(fake_supabase)
 
     async def fake_compute(pid, uid):
-        return {'portfolio_id': pid, 'global_score': 55, 'sub_scores': [], 'alerts': []}
+        raise ValueError(f'Portfolio {pid} not found')
 
     monkeypatch.setattr(portfolios_router, 'compute_portfolio_score', fake_compute)
 
-    client = TestClient(app)
     resp = client.get(f"/api/portfolios/{portfolio_id}/score", headers={"Authorization": "Bearer token"})
-    assert resp.status_code == 403
+    assert resp.status_code == 404
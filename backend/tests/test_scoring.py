@@ -23,6 +23,9 @@ class FakeTable:
 
     def eq(self, key, value):
         return self
+    
+    def in_(self, key, values):
+        return self
 
     def execute(self):
         return SimpleNamespace(data=self._data)
@@ -33,10 +36,10 @@ def make_fake_supabase(data):
 
 
 def run_async(coro):
-    return asyncio.get_event_loop().run_until_complete(coro)
+    return asyncio.run(coro)
 
 
-def test_compute_portfolio_score_happy_path():
+def test_compute_portfolio_score_happy_path(monkeypatch):
     # Portfolio profile: target 50% equity
     positions = [
         {'current_value': 600, 'asset_class': 'action', 'sector': 'Technology', 'currency': 'USD', 'region': 'usa', 'perf_1y': 10, 'volatility_1y': 12},
@@ -45,12 +48,12 @@ def test_compute_portfolio_score_happy_path():
 
     fake_supabase = make_fake_supabase(positions)
 
-    scoring.get_supabase = lambda: fake_supabase
+    monkeypatch.setattr(scoring, 'get_supabase', lambda: fake_supabase)
 
     async def fake_get_profile(supabase, portfolio_id, user_id):
         return {'investor_profile': 'equilibre', 'target_equity_pct': 50}
 
-    scoring.get_portfolio_profile = fake_get_profile
+    monkeypatch.setattr(scoring, 'get_portfolio_profile', fake_get_profile)
 
     result = run_async(scoring.compute_portfolio_score('portfolio-1', 'user-1'))
 
@@ -62,7 +65,7 @@ def test_compute_portfolio_score_happy_path():
     assert len(result.sub_scores) == 4  # Verify all 4 sub-scores are present
 
 
-def test_compute_portfolio_score_high_concentration_alert():
+def test_compute_portfolio_score_high_concentration_alert(monkeypatch):
     positions = [
         {'current_value': 900, 'asset_class': 'action', 'sector': 'Technology', 'currency': 'USD', 'region': 'usa', 'perf_1y': 5, 'volatility_1y': 20},
         {'current_value': 100, 'asset_class': 'action', 'sector': 'Utilities', 'currency': 'EUR', 'region': 'europe', 'perf_1y': 1, 'volatility_1y': 10}
@@ -70,14 +73,42 @@ def test_compute_portfolio_score_high_concentration_alert():
 
     fake_supabase = make_fake_supabase(positions)
 
-    scoring.get_supabase = lambda: fake_supabase
+    monkeypatch.setattr(scoring, 'get_supabase', lambda: fake_supabase)
 
     async def fake_get_profile(supabase, portfolio_id, user_id):
         return {'investor_profile': 'dynamique', 'target_equity_pct': 80}
 
-    scoring.get_portfolio_profile = fake_get_profile
+    monkeypatch.setattr(scoring, 'get_portfolio_profile', fake_get_profile)
 
     result = run_async(scoring.compute_portfolio_score('portfolio-2', 'user-2'))
 
     codes = [a.code for a in (result.alerts or [])]
     assert 'HIGH_CONCENTRATION' in codes
+
+
+def test_compute_portfolio_scores_groups_positions_by_portfolio(monkeypatch):
+    positions_1 = [
+        {'portfolio_id': 'portfolio-1', 'current_value': 600, 'asset_class': 'action', 'sector': 'Technology', 'currency': 'USD', 'region': 'usa', 'perf_1y': 10, 'volatility_1y': 12},
+        {'portfolio_id': 'portfolio-1', 'current_value': 400, 'asset_class': 'obligation', 'sector': 'Financials', 'currency': 'EUR', 'region': 'europe', 'perf_1y': 2, 'volatility_1y': 8}
+    ]
+    positions_2 = [
+        {'portfolio_id': 'portfolio-2', 'current_value': 900, 'asset_class': 'action', 'sector': 'Technology', 'currency': 'USD', 'region': 'usa', 'perf_1y': 5, 'volatility_1y': 20},
+        {'portfolio_id': 'portfolio-2', 'current_value': 100, 'asset_class': 'action', 'sector': 'Utilities', 'currency': 'EUR', 'region': 'europe', 'perf_1y': 1, 'volatility_1y': 10}
+    ]
+
+    async def fake_get_profile(supabase, portfolio_id, user_id):
+        return {'investor_profile': 'equilibre', 'target_equity_pct': 50}
+
+    monkeypatch.setattr(scoring, 'get_portfolio_profile', fake_get_profile)
+
+    monkeypatch.setattr(scoring, 'get_supabase', lambda: make_fake_supabase(positions_1 + positions_2))
+    results = run_async(scoring.compute_portfolio_scores(['portfolio-1', 'portfolio-2', 'portfolio-3'], 'user-1'))
+
+    assert set(results) == {'portfolio-1', 'portfolio-2', 'portfolio-3'}
+    # Each portfolio is scored on its own positions only
+    for portfolio_id, positions in (('portfolio-1', positions_1), ('portfolio-2', positions_2)):
+        monkeypatch.setattr(scoring, 'get_supabase', lambda positions=positions: make_fake_supabase(positions))
+        single = run_async(scoring.compute_portfolio_score(portfolio_id, 'user-1'))
+        assert results[portfolio_id] == single
+    # No positions: empty-portfolio score
+    assert results['portfolio-3'].global_score == 0.0
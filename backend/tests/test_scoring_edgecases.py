@@ -31,18 +31,18 @@ def make_fake_supabase(data):
 
 
 def run_async(coro):
-    return asyncio.get_event_loop().run_until_complete(coro)
+    return asyncio.run(coro)
 
 
-def test_empty_portfolio_returns_neutral_score():
+def test_empty_portfolio_returns_neutral_score(monkeypatch):
     # No positions -> neutral score expected (50)
     fake_supabase = make_fake_supabase([])
-    scoring.get_supabase = lambda: fake_supabase
+    monkeypatch.setattr(scoring, 'get_supabase', lambda: fake_supabase)
 
     async def fake_get_profile(supabase, portfolio_id, user_id):
         return {'investor_profile': 'equilibre', 'target_equity_pct': 50}
 
-    scoring.get_portfolio_profile = fake_get_profile
+    monkeypatch.setattr(scoring, 'get_portfolio_profile', fake_get_profile)
 
     result = run_async(scoring.compute_portfolio_score('p-empty', 'user-1'))
     # Empty portfolio returns 0 score, not 50 (which is more accurate for an empty portfolio)
@@ -53,18 +53,18 @@ def test_empty_portfolio_returns_neutral_score():
     assert 'LOW_DIVERSIFICATION' in codes
 
 
-def test_all_cash_portfolio_low_equity_score():
+def test_all_cash_portfolio_low_equity_score(monkeypatch):
     # All positions are cash -> equity pct 0 => risk_profile should be penalized against target 50
     positions = [
         {'current_value': 1000.0, 'asset_class': 'cash', 'currency': 'EUR', 'region': 'europe', 'sector': 'cash'}
     ]
     fake_supabase = make_fake_supabase(positions)
-    scoring.get_supabase = lambda: fake_supabase
+    monkeypatch.setattr(scoring, 'get_supabase', lambda: fake_supabase)
 
     async def fake_get_profile2(supabase, portfolio_id, user_id):
         return {'investor_profile': 'equilibre', 'target_equity_pct': 50}
 
-    scoring.get_portfolio_profile = fake_get_profile2
+    monkeypatch.setattr(scoring, 'get_portfolio_profile', fake_get_profile2)
 
     result = run_async(scoring.compute_portfolio_score('p-cash', 'user-1'))
     # Expect risk_profile low
@@ -72,18 +72,18 @@ def test_all_cash_portfolio_low_equity_score():
     assert rp is not None and rp.value < 60
 
 
-def test_extremely_volatile_assets_reduce_asset_quality():
+def test_extremely_volatile_assets_reduce_asset_quality(monkeypatch):
     positions = [
         {'current_value': 500, 'asset_class': 'action', 'currency': 'USD', 'region': 'usa', 'sector': 'technology', 'perf_1y': -20.0, 'volatility_1y': 80.0},
         {'current_value': 500, 'asset_class': 'action', 'currency': 'USD', 'region': 'usa', 'sector': 'technology', 'perf_1y': -15.0, 'volatility_1y': 70.0}
     ]
     fake_supabase = make_fake_supabase(positions)
-    scoring.get_supabase = lambda: fake_supabase
+    monkeypatch.setattr(scoring, 'get_supabase', lambda: fake_supabase)
 
     async def fake_get_profile3(supabase, portfolio_id, user_id):
         return {'investor_profile': 'dynamique', 'target_equity_pct': 80}
 
-    scoring.get_portfolio_profile = fake_get_profile3
+    monkeypatch.setattr(scoring, 'get_portfolio_profile', fake_get_profile3)
 
     result = run_async(scoring.compute_portfolio_score('p-volatile', 'user-1'))
     aq = next((s for s in result.sub_scores if s.name == 'asset_quality'), None)
@@ -4,11 +4,8 @@ import utils.supabase_client as sbc
 
 
 def teardown_function(function):
-    # clear lru_cache between tests
-    try:
-        sbc.get_supabase_client.cache_clear()
-    except Exception:
-        pass
+    # reset the shared client between tests
+    sbc.reset()
 
 
 def test_missing_config_raises(monkeypatch):
@@ -41,7 +38,7 @@ def test_create_client_called(monkeypatch):
     try:
         sbc.settings.SUPABASE_URL = "http://localhost"
         sbc.settings.SUPABASE_SERVICE_ROLE_KEY = "test"
-        sbc.get_supabase_client.cache_clear()
+        sbc.reset()
         client = sbc.get_supabase_client()
         assert client == 'FAKE_CLIENT'
         assert called['url'] == "http://localhost"
@@ -49,4 +46,3 @@ def test_create_client_called(monkeypatch):
     finally:
         sbc.settings.SUPABASE_URL = orig_url
         sbc.settings.SUPABASE_SERVICE_ROLE_KEY = orig_key
-*** End Patch
\ No newline at end of file
@@ -14,11 +14,8 @@ import utils.supabase_client as sbc
 
 
 def teardown_function(function):
-    # clear lru_cache between tests
-    try:
-        sbc.get_supabase_client.cache_clear()
-    except Exception:
-        pass
+    # reset the shared client between tests
+    sbc.reset()
 
 
 def test_missing_config_raises(monkeypatch):
@@ -51,7 +48,7 @@ def test_create_client_called(monkeypatch):
     try:
         sbc.settings.SUPABASE_URL = "http://localhost"
         sbc.settings.SUPABASE_SERVICE_ROLE_KEY = "test"
-        sbc.get_supabase_client.cache_clear()
+        sbc.reset()
         client = sbc.get_supabase_client()
         assert client == 'FAKE_CLIENT'
         assert called['url'] == "http://localhost"
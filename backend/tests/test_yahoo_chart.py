@@ -0,0 +1,62 @@
+import asyncio
+import os
+import sys
+
+import httpx
+
+# make backend package importable
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from utils.yahoo_chart import fetch_daily_closes, fetch_daily_closes_many
+
+
+def _fetch(handler, symbol='MC.PA'):
+    async def run():
+        async with httpx.AsyncClient(transport=httpx.MockTransport(handler)) as client:
+            return await fetch_daily_closes(client, symbol)
+    return asyncio.run(run())
+
+
+def test_closes_are_parsed_and_missing_sessions_dropped():
+    def handler(request):
+        assert request.url.path == '/v8/finance/chart/MC.PA'
+        assert request.url.params['range'] == '1y'
+        return httpx.Response(200, json={'chart': {'result': [
+            {'indicators': {'quote': [{'close': [100.0, None, 101.5, 102.0]}]}}
+        ], 'error': None}})
+
+    closes = _fetch(handler)
+
+    assert closes.tolist() == [100.0, 101.5, 102.0]
+
+
+def test_unknown_ticker_returns_none():
+    def handler(request):
+        return httpx.Response(404, json={'chart': {'result': None, 'error': {'code': 'Not Found'}}})
+
+    assert _fetch(handler, 'NOPE.PA') is None
+
+
+def test_many_use_the_given_client_and_rate_limiter():
+    class CountingLimiter:
+        calls = 0
+
+        async def acquire_async(self):
+            CountingLimiter.calls += 1
+
+    def handler(request):
+        if request.url.path.endswith('/NOPE.PA'):
+            return httpx.Response(404, json={'chart': {'result': None}})
+        return httpx.Response(200, json={'chart': {'result': [
+            {'indicators': {'quote': [{'close': [10.0, 11.0]}]}}
+        ]}})
+
+    async def run():
+        async with httpx.AsyncClient(transport=httpx.MockTransport(handler)) as client:
+            return await fetch_daily_closes_many(client, ['MC.PA', 'NOPE.PA', 'MC.PA'], 4, rate_limiter=CountingLimiter())
+
+    closes = asyncio.run(run())
+
+    assert list(closes) == ['MC.PA']
+    # One paced request per unique ticker
+    assert CountingLimiter.calls == 2
@@ -0,0 +1,51 @@
+"""
+Async helpers for the synchronous supabase-py client.
+
+Every `.execute()` of the sync client performs a blocking HTTP round-trip.
+Called directly from an `async def` endpoint it blocks the event loop, so all
+other requests handled by the worker wait for it. These helpers run the
+blocking call in a worker thread instead.
+
+This module has no Supabase import on purpose: services that avoid loading
+the client at import time (see services.scoring) can use it freely.
+"""
+
+import asyncio
+import logging
+
+import httpx
+
+logger = logging.getLogger(__name__)
+
+# Only idempotent requests are replayed after a dropped connection
+_RETRYABLE_METHODS = frozenset({'GET', 'HEAD'})
+
+
+async def sb_execute(query):
+    """
+    Execute a PostgREST query builder without blocking the event loop.
+
+    The shared client keeps connections alive between requests; when the
+    server has already closed a pooled connection, httpx raises
+    RemoteProtocolError. Read queries are retried once on a fresh connection.
+
+    Usage:
+        ```python
+        response = await sb_execute(
+            supabase.table('portfolios').select('id').eq('id', portfolio_id)
+        )
+        ```
+
+    Args:
+        query: Any supabase-py request builder (select/insert/update/rpc...)
+
+    Returns:
+        The builder's `execute()` result (APIResponse)
+    """
+    try:
+        return await asyncio.to_thread(query.execute)
+    except httpx.RemoteProtocolError as e:
+        if getattr(query, 'http_method', None) not in _RETRYABLE_METHODS:
+            raise
+        logger.warning(f"Stale Supabase connection, retrying once: {e}")
+        return await asyncio.to_thread(query.execute)
@@ -0,0 +1,73 @@
+"""
+Persistent Market Data Cache
+
+SQLite-backed cache for Yahoo Finance results, shared by every enrichment run
+of the process and kept across restarts. Yahoo aggressively rate-limits, and
+the same tickers come back across portfolios: a warm entry replaces a network
+request with a local SELECT.
+
+Two tables, each keyed by ticker:
+- `ticker_snapshot`: price/performance metrics (short TTL, prices move daily)
+- `ticker_profile`: descriptive fields - name, sector, type... (long TTL)
+
+Payloads are stored as orjson-encoded bytes (BLOB). The connection is shared
+between worker threads (`check_same_thread=False`) and serialized with a
+lock; WAL journaling lets other processes read while one writes.
+"""
+
+from pathlib import Path
+from typing import Dict, Optional
+import logging
+import sqlite3
+import threading
+import time
+
+import orjson
+
+logger = logging.getLogger(__name__)
+
+SNAPSHOT_TABLE = 'ticker_snapshot'
+PROFILE_TABLE = 'ticker_profile'
+
+
+class MarketDataCache:
+    """Ticker-keyed JSON payloads with a per-read maximum age."""
+
+    def __init__(self, path: str):
+        if path != ':memory:':
+            Path(path).parent.mkdir(parents=True, exist_ok=True)
+
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(path, check_same_thread=False)
+        with self._lock, self._conn:
+            self._conn.execute('PRAGMA journal_mode=WAL')
+            for table in (SNAPSHOT_TABLE, PROFILE_TABLE):
+                self._conn.execute(
+                    f'CREATE TABLE IF NOT EXISTS {table} ('
+                    'ticker TEXT PRIMARY KEY, payload_json BLOB NOT NULL, fetched_at REAL NOT NULL)'
+                )
+
+    def get(self, table: str, ticker: str, max_age: float) -> Optional[Dict]:
+        """
+        Return the payload cached for ticker, or None if missing or older
+        than max_age seconds.
+        """
+        with self._lock:
+            row = self._conn.execute(
+                f'SELECT payload_json FROM {table} WHERE ticker = ? AND fetched_at > ?',
+                (ticker, time.time() - max_age)
+            ).fetchone()
+        return orjson.loads(row[0]) if row else None
+
+    def set(self, table: str, ticker: str, payload: Dict) -> None:
+        """Store (or replace) the payload of ticker, stamped with the current time."""
+        with self._lock, self._conn:
+            self._conn.execute(
+                f'INSERT OR REPLACE INTO {table} (ticker, payload_json, fetched_at) VALUES (?, ?, ?)',
+                (ticker, orjson.dumps(payload), time.time())
+            )
+
+    def close(self) -> None:
+        """Close the underlying SQLite connection."""
+        with self._lock:
+            self._conn.close()
@@ -0,0 +1,44 @@
+"""
+Thread-safe Rate Limiter
+
+Spaces out calls to a rate-limited external API (Yahoo Finance) across all
+worker threads of the process. Each caller reserves the next free slot under
+a lock and sleeps outside of it, so concurrent workers overlap their network
+round-trips while the start of two calls stays at least `interval` apart.
+
+Threads (`acquire`) and coroutines (`acquire_async`) draw from the same slot
+schedule, so blocking yfinance calls and async chart requests share one pace.
+"""
+
+import asyncio
+import threading
+import time
+
+
+class RateLimiter:
+    """Allow at most one call start every `interval` seconds, process-wide."""
+
+    def __init__(self, interval: float):
+        self.interval = interval
+        self._lock = threading.Lock()
+        self._next_slot = 0.0
+
+    def _reserve(self) -> float:
+        """Reserve the next free slot and return how long to wait for it."""
+        with self._lock:
+            now = time.monotonic()
+            slot = max(now, self._next_slot)
+            self._next_slot = slot + self.interval
+        return slot - now
+
+    def acquire(self) -> None:
+        """Block until the caller may issue its request."""
+        delay = self._reserve()
+        if delay > 0:
+            time.sleep(delay)
+
+    async def acquire_async(self) -> None:
+        """Wait (without blocking the event loop) until the caller may issue its request."""
+        delay = self._reserve()
+        if delay > 0:
+            await asyncio.sleep(delay)
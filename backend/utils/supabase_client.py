@@ -11,28 +11,55 @@ SECURITY WARNING:
 """
 
 from supabase import create_client, Client
-from functools import lru_cache
+from typing import Optional
 import logging
+import threading
 
 from config import settings
 
 logger = logging.getLogger(__name__)
 
+# Process-wide client, created on first use (see get_supabase_client)
+_client: Optional[Client] = None
+_client_lock = threading.Lock()
+
 
-@lru_cache()
 def get_supabase_client() -> Client:
     """
-    Get a cached Supabase client with service_role privileges.
+    Get the shared Supabase client with service_role privileges.
     
     This client bypasses Row Level Security and should only be used
     for backend operations that require elevated privileges.
     
+    The client is created once; later calls return it without taking the
+    lock (double-checked initialization).
+    
     Returns:
         Client: Configured Supabase client
     
     Raises:
         ValueError: If Supabase credentials are not configured
     """
+    global _client
+    client = _client
+    if client is not None:
+        return client
+    
+    with _client_lock:
+        if _client is None:
+            _client = _create_client()
+        return _client
+
+
+def reset() -> None:
+    """Forget the shared client so the next call creates a new one (tests)."""
+    global _client
+    with _client_lock:
+        _client = None
+
+
+def _create_client() -> Client:
+    """Create a Supabase client from the service_role settings."""
     if not settings.SUPABASE_URL or not settings.SUPABASE_SERVICE_ROLE_KEY:
         raise ValueError(
             "Supabase configuration missing. "
@@ -107,11 +134,35 @@ def get_supabase() -> Client:
     return get_supabase_client()
 
 
+def close_supabase_client() -> None:
+    """
+    Close the HTTP connections of the cached Supabase client, if one exists.
+    
+    Called on application shutdown. The shared client is reset so that a
+    later `get_supabase()` call builds a fresh client.
+    """
+    client = _client
+    if client is None:
+        return
+    
+    try:
+        # httpx.Client behind the PostgREST client (pooled keep-alive connections)
+        client.postgrest.session.close()
+    except Exception as e:
+        logger.warning(f"Could not close Supabase HTTP session: {e}")
+    finally:
+        reset()
+
+
 # NOTE: Do NOT create a global supabase client at import time.
 # Creating the client eagerly (at import) can cause network calls and
 # configuration/credential errors during test collection. Use `get_supabase()`
 # where needed or override the dependency in tests.
-supabase = None
+def __getattr__(name: str):
+    """Resolve `supabase` lazily to the shared client (PEP 562)."""
+    if name == 'supabase':
+        return get_supabase_client()
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
 
 
 # =====================================================
@@ -0,0 +1,130 @@
+"""
+Async Yahoo Finance Chart Client
+
+Fetches daily close series straight from Yahoo's v8 chart endpoint with
+httpx, without going through yfinance's synchronous stack. One request per
+ticker, in flight concurrently (bounded by a semaphore) on a pooled
+AsyncClient that the caller keeps across runs (see `create_chart_client`).
+Request starts can be paced by a shared `RateLimiter`.
+
+The chart endpoint needs no cookie/crumb, only a browser-like User-Agent.
+"""
+
+from typing import Dict, Iterable, Optional
+import asyncio
+import logging
+
+import lazy_imports
+from utils.rate_limit import RateLimiter
+
+logger = logging.getLogger(__name__)
+
+_CHART_URL = 'https://query2.finance.yahoo.com/v8/finance/chart/{symbol}'
+
+_HEADERS = {'User-Agent': 'Mozilla/5.0 (X11; Linux x86_64)'}
+
+# Transient responses retried with exponential backoff (throttling, gateway errors)
+_RETRY_STATUSES = (429, 502, 503)
+_MAX_RETRIES = 3
+_BACKOFF_FACTOR = 1.5
+
+
+def create_chart_client(concurrency: int, timeout: float = 10.0):
+    """
+    Create the pooled httpx.AsyncClient used for chart requests.
+    
+    Args:
+        concurrency: Maximum number of connections (requests in flight)
+        timeout: Per-request timeout in seconds
+    
+    Returns:
+        httpx.AsyncClient (to be closed with `aclose()` by its owner)
+    """
+    httpx = lazy_imports.httpx
+    limits = httpx.Limits(max_connections=concurrency, max_keepalive_connections=concurrency)
+    return httpx.AsyncClient(headers=_HEADERS, timeout=timeout, limits=limits)
+
+
+async def fetch_daily_closes(client, symbol: str, period: str = '1y', rate_limiter: Optional[RateLimiter] = None):
+    """
+    Fetch the daily close prices of one ticker.
+    
+    Args:
+        client: httpx.AsyncClient
+        symbol: Yahoo Finance ticker
+        period: Yahoo range keyword (e.g. '1y')
+        rate_limiter: Optional limiter paced before every request (retries included)
+
+    Returns:
+        float64 array of closes (missing sessions dropped), or None if
+        Yahoo has no data for the ticker
+    """
+    url = _CHART_URL.format(symbol=symbol)
+    params = {'range': period, 'interval': '1d', 'includePrePost': 'false', 'events': ''}
+
+    for attempt in range(_MAX_RETRIES + 1):
+        if rate_limiter is not None:
+            await rate_limiter.acquire_async()
+        response = await client.get(url, params=params)
+        if response.status_code not in _RETRY_STATUSES or attempt == _MAX_RETRIES:
+            break
+        await asyncio.sleep(_BACKOFF_FACTOR * 2 ** attempt)
+
+    if response.status_code != 200:
+        logger.warning("Chart request for %s failed: HTTP %s", symbol, response.status_code)
+        return None
+
+    results = (response.json().get('chart') or {}).get('result') or []
+    if not results:
+        return None
+
+    try:
+        raw_closes = results[0]['indicators']['quote'][0]['close']
+    except (KeyError, IndexError, TypeError):
+        return None
+
+    np = lazy_imports.numpy
+    # Sessions without a close come back as null -> NaN, then dropped
+    closes = np.array(raw_closes, dtype=np.float64)
+    closes = closes[~np.isnan(closes)]
+    return closes if closes.size else None
+
+
+async def fetch_daily_closes_many(
+    client,
+    symbols: Iterable[str],
+    concurrency: int,
+    period: str = '1y',
+    rate_limiter: Optional[RateLimiter] = None
+) -> Dict[str, object]:
+    """
+    Fetch daily close series for several tickers concurrently.
+    
+    Args:
+        client: httpx.AsyncClient (see `create_chart_client`)
+        symbols: Yahoo Finance tickers
+        concurrency: Maximum number of requests in flight
+        period: Yahoo range keyword (e.g. '1y')
+        rate_limiter: Optional limiter spacing out request starts
+
+    Returns:
+        Dictionary ticker -> float64 array of closes, without the tickers
+        for which no data could be fetched
+    """
+    symbols = list(dict.fromkeys(symbols))
+    if not symbols:
+        return {}
+
+    semaphore = asyncio.Semaphore(concurrency)
+    
+    async def fetch_bounded(symbol: str) -> Optional[object]:
+        async with semaphore:
+            try:
+                return await fetch_daily_closes(client, symbol, period, rate_limiter)
+            except Exception as e:
+                logger.error("❌ Error downloading history for %s: %s", symbol, e)
+                return None
+    
+    closes = await asyncio.gather(*(fetch_bounded(symbol) for symbol in symbols))
+
+    return {symbol: series for symbol, series in zip(symbols, closes) if series is not None}
@@ -96,8 +96,8 @@ export function CreateClientModal({ isOpen, onClose, onClientCreated }: CreateCl
       if (importResult.success) {
         let description = `${importResult.rows_imported} position${importResult.rows_imported > 1 ? 's' : ''} importée${importResult.rows_imported > 1 ? 's' : ''}`;
         
-        if (importResult.enrichment) {
-          description += `\n${importResult.enrichment.success} actif${importResult.enrichment.success > 1 ? 's' : ''} enrichi${importResult.enrichment.success > 1 ? 's' : ''}`;
+        if (importResult.enrichment?.status === 'queued') {
+          description += `\nEnrichissement des données marché en cours`;
         }
 
         if (importResult.rows_failed > 0) {
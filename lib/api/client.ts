@@ -40,7 +40,11 @@ export interface CSVImportResult {
   rows_imported: number;
   rows_failed: number;
   errors: CSVImportError[];
-  enrichment?: EnrichmentResult;
+  enrichment?: EnrichmentStatus;
+}
+
+export interface EnrichmentStatus {
+  status: 'queued';
 }
 
 export interface AssetSummary {
@@ -0,0 +1,62 @@
+-- =====================================================
+-- ONEWEALTH - MIGRATION PERFORMANCE
+-- =====================================================
+-- Fonctions SQL permettant au backend de regrouper ses requêtes
+-- (un seul aller-retour PostgREST au lieu d'une requête par ligne)
+-- À exécuter après supabase-migration-sprint1.sql
+-- OBLIGATOIRE pour l'enrichissement (colonne assets.series_hash)
+-- =====================================================
+
+-- =====================================================
+-- 1. FONCTION : Mise à jour groupée des assets
+-- =====================================================
+
+-- Met à jour les données marché de plusieurs assets en une seule requête.
+-- Sémantique "update only" : les ISIN absents de la table sont ignorés
+-- (aucune insertion). Retourne la liste des ISIN effectivement mis à jour.
+--
+-- Exemple de payload :
+--   [{"isin": "FR0013380607", "sector": "Financial Services", "last_price": 83.45,
+--     "perf_1y": 15.2, "volatility_1y": 16.5, "data_source": "manual",
+--     "last_updated": "2024-11-19T10:00:00+00:00"}]
+CREATE OR REPLACE FUNCTION public.update_assets_bulk(payload JSONB)
+RETURNS TABLE (isin TEXT) AS $$
+  UPDATE public.assets AS a
+  SET
+    sector = t.sector,
+    last_price = t.last_price,
+    perf_1y = t.perf_1y,
+    volatility_1y = t.volatility_1y,
+    data_source = t.data_source,
+    last_updated = t.last_updated
+  FROM jsonb_to_recordset(payload) AS t(
+    isin TEXT,
+    sector TEXT,
+    last_price DECIMAL,
+    perf_1y DECIMAL,
+    volatility_1y DECIMAL,
+    data_source TEXT,
+    last_updated TIMESTAMPTZ
+  )
+  WHERE a.isin = t.isin
+  RETURNING a.isin;
+$$ LANGUAGE sql SECURITY DEFINER
+SET search_path = public, pg_temp;
+
+-- SECURITY DEFINER contourne la RLS : la fonction n'est exécutable que par
+-- service_role (clé utilisée par enrich_assets.py). PostgreSQL accorde
+-- EXECUTE à PUBLIC par défaut et Supabase l'accorde à anon / authenticated.
+REVOKE EXECUTE ON FUNCTION public.update_assets_bulk(JSONB) FROM PUBLIC, anon, authenticated;
+GRANT EXECUTE ON FUNCTION public.update_assets_bulk(JSONB) TO service_role;
+
+-- =====================================================
+-- 2. COLONNE : Empreinte de la série de prix
+-- =====================================================
+
+-- Hash (blake2b 64 bits) de la série de clôtures 1 an dont dérivent
+-- last_price, previous_close, price_change_pct, perf_1y et volatility_1y.
+-- Le backend compare l'empreinte avant d'écrire : une série inchangée
+-- (week-end, jour férié, snapshot en cache) ne met à jour que last_updated.
+-- OBLIGATOIRE : l'enrichissement lit cette colonne et échoue sans elle.
+ALTER TABLE public.assets
+  ADD COLUMN IF NOT EXISTS series_hash TEXT;